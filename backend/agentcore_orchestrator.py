@@ -1,28 +1,222 @@
 """AWS Bedrock AgentCore orchestrator for career planning workflow."""
 
 import aioboto3
+import aiohttp
+import base64
+import boto3
+import codecs
+import functools
+import botocore.session
 import os
 import logging
 import asyncio
-from typing import Dict, AsyncIterator, Optional
-from dotenv import load_dotenv
+import random
+import threading
+from contextlib import AsyncExitStack
+from typing import Dict, AsyncIterator, Optional, Union
+from urllib.parse import quote
+import orjson
+from aiobotocore.config import AioConfig
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.config import Config
+from botocore.eventstream import EventStreamBuffer
+from botocore.exceptions import ClientError, EventStreamError, NoCredentialsError
+from yarl import URL
+
+from trace_parser import log_dump, parse_trace_event
 
 # Configure logging for orchestrator
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+# Deployment settings are fixed for the life of the process
+_REGION = os.getenv("AWS_REGION", "us-east-1")
+_PLANNER_ID = os.getenv("AGENTCORE_PLANNER_AGENT_ID")
+_PLANNER_ALIAS_ID = os.getenv("AGENTCORE_PLANNER_ALIAS_ID")
+# Completion stream backend: "aioboto3", "thread" (boto3 on a worker thread)
+# or "http" (SigV4-signed aiohttp request with direct eventstream decoding)
+_STREAM_BACKEND = os.getenv("AGENTCORE_STREAM_BACKEND", "aioboto3")
+
+# Let botocore retry throttled calls with jittered, token-bucket backoff; the
+# pooled, keepalive connections are shared by every concurrent stream
+_CLIENT_CONFIG = AioConfig(
+    retries={"max_attempts": 5, "mode": "adaptive"},
+    max_pool_connections=50,
+    tcp_keepalive=True,
+)
+_SYNC_CLIENT_CONFIG = Config(retries={"max_attempts": 5, "mode": "adaptive"})
+
+# Marks the end of a threaded (or polled) completion stream
+_STREAM_END = object()
+
+# Chunk coalescing thresholds for invoke_supervisor_stream
+_CHUNK_FLUSH_BYTES = 4096
+_CHUNK_FLUSH_SECONDS = 0.016
+
+# Error codes worth retrying; the event stream reports throttling in camelCase
+_RETRYABLE_CODES = frozenset(
+    {
+        "ThrottlingException",
+        "throttlingException",
+        "TooManyRequestsException",
+        "ProvisionedThroughputExceededException",
+    }
+)
+
+
+def _encode_event(payload) -> bytes:
+    """Serialize yielded stream events to UTF-8 JSON bytes."""
+    return orjson.dumps(payload)
+
+
+def _sse_frame(payload: Dict) -> bytes:
+    """Encode an event as a ready-to-send Server-Sent Events frame."""
+    return b"data: " + _encode_event(payload) + b"\n\n"
+
+
+def _decode_stream_message(message) -> Dict:
+    """Turn an InvokeAgent eventstream message into a botocore-shaped event."""
+    headers = message.headers
+    payload = orjson.loads(message.payload) if message.payload else {}
+    if headers.get(":message-type") == "event":
+        event_type = headers.get(":event-type")
+        if event_type == "chunk" and "bytes" in payload:
+            payload["bytes"] = base64.b64decode(payload["bytes"])
+        return {event_type: payload}
+    code = headers.get(":exception-type") or headers.get(":error-code") or "Unknown"
+    message_text = payload.get("message") or headers.get(":error-message", "")
+    raise EventStreamError({"Error": {"Code": code, "Message": message_text}}, "InvokeAgent")
+
+
+async def _next_event(events: AsyncIterator[Dict]):
+    """Return the next event of a stream, or _STREAM_END once it is exhausted."""
+    try:
+        return await events.__anext__()
+    except StopAsyncIteration:
+        return _STREAM_END
+
+
+def _is_retryable(exc: ClientError) -> bool:
+    """True when a ClientError carries a throttling/capacity error code."""
+    response = getattr(exc, "response", None) or {}
+    return response.get("Error", {}).get("Code") in _RETRYABLE_CODES
 
 
 class AgentCoreOrchestrator:
     """Async wrapper around AWS Bedrock AgentCore runtime for career planning."""
 
+    encode_event = staticmethod(_encode_event)
+    sse_frame = staticmethod(_sse_frame)
+    log_dump = staticmethod(log_dump)
+
+    # Caps concurrent agent invocations per process so bursts queue here
+    # instead of being rejected by Bedrock and retried after a round-trip
+    _inflight = asyncio.Semaphore(int(os.getenv("BEDROCK_MAX_INFLIGHT", "8")))
+
     def __init__(self):
-        self.region = os.getenv("AWS_REGION", "us-east-1")
-        self.planner_id = os.getenv("AGENTCORE_PLANNER_AGENT_ID")
-        self.planner_alias_id = os.getenv("AGENTCORE_PLANNER_ALIAS_ID")
+        self.region = _REGION
+        self.planner_id = _PLANNER_ID
+        self.planner_alias_id = _PLANNER_ALIAS_ID
         self.session = aioboto3.Session()
-        self.collaborator_invocation_counts = {}
-        self.action_group_invocations = {}  # Track action group calls by traceId
+        self._client = None
+        self._client_stack: Optional[AsyncExitStack] = None
+        self._client_lock = asyncio.Lock()
+        self._sync_client = None
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._credentials = None
+
+    async def _get_client(self):
+        """Return the shared bedrock-agent-runtime client, creating it on first use."""
+        if self._client is not None:
+            return self._client
+        async with self._client_lock:
+            if self._client is None:
+                stack = AsyncExitStack()
+                self._client = await stack.enter_async_context(
+                    self.session.client(
+                        "bedrock-agent-runtime",
+                        region_name=self.region,
+                        config=_CLIENT_CONFIG,
+                    )
+                )
+                self._client_stack = stack
+        return self._client
+
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Return the shared keepalive aiohttp session used by the http backend."""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=300),
+            )
+        return self._http
+
+    async def _get_frozen_credentials(self):
+        """Resolve (and, when due, refresh) signing credentials off the event loop.
+
+        Both steps may hit the network for SSO, container or instance role
+        credentials, so they run on a worker thread.
+        """
+        if self._credentials is None:
+            credentials = await asyncio.to_thread(
+                botocore.session.get_session().get_credentials
+            )
+            if credentials is None:
+                raise NoCredentialsError()
+            self._credentials = credentials
+        return await asyncio.to_thread(self._credentials.get_frozen_credentials)
+
+    def _sign(self, url: str, body: bytes, credentials) -> Dict[str, str]:
+        """SigV4-sign an InvokeAgent request and return its headers."""
+        request = AWSRequest(
+            method="POST",
+            url=url,
+            data=body,
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/vnd.amazon.eventstream",
+            },
+        )
+        SigV4Auth(credentials, "bedrock", self.region).add_auth(request)
+        return dict(request.headers.items())
+
+    async def start(self) -> None:
+        """Open the shared runtime client ahead of the first request."""
+        if self.planner_id:
+            await self._get_client()
+            if _STREAM_BACKEND == "http":
+                await self._get_frozen_credentials()
+
+    def _get_sync_client(self):
+        """Return the shared boto3 runtime client used by the threaded backend."""
+        if self._sync_client is None:
+            self._sync_client = boto3.client(
+                "bedrock-agent-runtime",
+                region_name=self.region,
+                config=_SYNC_CLIENT_CONFIG,
+            )
+        return self._sync_client
+
+    async def aclose(self) -> None:
+        """Close the shared runtime client, if one was opened."""
+        stack = self._client_stack
+        self._client = None
+        self._client_stack = None
+        if stack is not None:
+            await stack.aclose()
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    # (user_context key, label) pairs rendered ahead of the student request
+    _CTX_LABELS = (
+        ("user_name", "Student Name"),
+        ("user_major", "Major"),
+        ("graduation_year", "Expected Graduation"),
+        ("skills", "Current Skills"),
+    )
+    _NO_CTX_TMPL = "Create a comprehensive career plan for: {}".format
+    _REQUEST_SEP = "\n\nStudent Request: "
 
     def _build_input_text(
         self, goal: str, user_context: Optional[Dict[str, str]] = None
@@ -30,447 +224,358 @@ class AgentCoreOrchestrator:
         """Build input text with user context for the agent."""
         # Start with user context if provided
         if user_context:
-            context_parts = []
-
-            # Add user profile info
-            if user_context.get("user_name"):
-                context_parts.append(f"Student Name: {user_context['user_name']}")
-            if user_context.get("user_major"):
-                context_parts.append(f"Major: {user_context['user_major']}")
-            if user_context.get("graduation_year"):
-                context_parts.append(
-                    f"Expected Graduation: {user_context['graduation_year']}"
-                )
-            if user_context.get("skills"):
-                context_parts.append(f"Current Skills: {user_context['skills']}")
-
-            # Build message with context
-            context_str = "\n".join(context_parts)
-            return f"{context_str}\n\nStudent Request: {goal}"
-
-        return f"Create a comprehensive career plan for: {goal}"
+            context_str = "\n".join(
+                [
+                    f"{label}: {value}"
+                    for key, label in self._CTX_LABELS
+                    if (value := user_context.get(key))
+                ]
+            )
+            return context_str + self._REQUEST_SEP + goal
+
+        return self._NO_CTX_TMPL(goal)
+
+    # Keys forwarded to the agent as sessionAttributes
+    _SESSION_ATTR_KEYS = (
+        "user_name",
+        "user_email",
+        "user_phone",
+        "user_location",
+        "user_major",
+        "graduation_year",
+        "gpa",
+        "career_goal",
+        "bio",
+        "student_year",
+        "courses_taken",
+        "time_commitment",
+        "skills",
+        "experience",
+    )
 
     def _build_session_attributes(self, user_context: Dict[str, str]) -> Dict[str, str]:
         """Build sessionAttributes from user context."""
-        return {
-            "user_name": user_context.get("user_name") or "",
-            "user_email": user_context.get("user_email") or "",
-            "user_phone": user_context.get("user_phone") or "",
-            "user_location": user_context.get("user_location") or "",
-            "user_major": user_context.get("user_major") or "",
-            "graduation_year": user_context.get("graduation_year") or "",
-            "gpa": user_context.get("gpa") or "",
-            "career_goal": user_context.get("career_goal") or "",
-            "bio": user_context.get("bio") or "",
-            "student_year": user_context.get("student_year") or "",
-            "courses_taken": user_context.get("courses_taken") or "",
-            "time_commitment": user_context.get("time_commitment") or "",
-            "skills": user_context.get("skills") or "",
-            "experience": user_context.get("experience") or "",
-        }
-
-    def _parse_trace_event(self, event: Dict, session_id: str) -> Dict:
-        """Extract useful info from trace event."""
-        trace_part = event.get("trace", {})
-        trace_data = trace_part.get("trace", {})
-        
-        # Log raw trace_part keys to see what's available
-        logger.info(f"Trace part keys: {list(trace_part.keys())}")
-        logger.info(f"Trace data keys: {list(trace_data.keys())}")
-
-        # Extract agent/collaborator info
-        collaborator_name = trace_part.get("collaboratorName")
-        agent_label = (
-            f"Collaborator: {collaborator_name}" if collaborator_name else "Supervisor"
+        get = user_context.get
+        return {key: get(key) or "" for key in self._SESSION_ATTR_KEYS}
+
+    async def _aio_events(self, invoke_params: Dict) -> AsyncIterator[Dict]:
+        """Invoke the agent with aioboto3 and iterate its completion stream."""
+        runtime_client = await self._get_client()
+        response = await runtime_client.invoke_agent(**invoke_params)
+        async for event in response["completion"]:
+            yield event
+
+    async def _threaded_events(self, invoke_params: Dict) -> AsyncIterator[Dict]:
+        """Invoke the agent with boto3 on a worker thread, bridging events back."""
+        client = self._get_sync_client()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        # Set when the consumer stops early, so the worker drops the stream
+        # instead of draining it into a queue nobody reads
+        stop = threading.Event()
+
+        def pump() -> None:
+            completion = None
+            try:
+                response = client.invoke_agent(**invoke_params)
+                completion = response["completion"]
+                for event in completion:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except Exception as exc:
+                if not stop.is_set():
+                    loop.call_soon_threadsafe(queue.put_nowait, exc)
+            finally:
+                if stop.is_set():
+                    if completion is not None:
+                        completion.close()
+                else:
+                    loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+        worker = asyncio.ensure_future(asyncio.to_thread(pump))
+        finished = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+            finished = True
+        finally:
+            stop.set()
+            if finished:
+                await worker
+            else:
+                # The thread notices the flag at its next event and closes
+                # the stream; nothing here needs its result
+                worker.cancel()
+
+    async def _http_events(self, invoke_params: Dict) -> AsyncIterator[Dict]:
+        """Invoke the agent over signed HTTP and decode eventstream frames directly."""
+        url = (
+            f"https://bedrock-agent-runtime.{self.region}.amazonaws.com"
+            f"/agents/{quote(invoke_params['agentId'], safe='')}"
+            f"/agentAliases/{quote(invoke_params['agentAliasId'], safe='')}"
+            f"/sessions/{quote(invoke_params['sessionId'], safe='')}/text"
         )
+        body = orjson.dumps(
+            {
+                "inputText": invoke_params["inputText"],
+                "enableTrace": invoke_params["enableTrace"],
+            }
+        )
+        headers = self._sign(url, body, await self._get_frozen_credentials())
+
+        async with self._get_http_session().post(
+            URL(url, encoded=True), data=body, headers=headers
+        ) as resp:
+            if resp.status != 200:
+                raw = await resp.read()
+                # Gateways and load balancers answer with HTML or plain text;
+                # keep their status and error type instead of a decode error
+                try:
+                    error = orjson.loads(raw or b"{}")
+                except orjson.JSONDecodeError:
+                    error = None
+                if not isinstance(error, dict):
+                    error = {"message": raw.decode(errors="replace")[:500]}
+                code = resp.headers.get("x-amzn-ErrorType", str(resp.status))
+                raise ClientError(
+                    {
+                        "Error": {
+                            "Code": code.split(":", 1)[0],
+                            "Message": error.get("message", ""),
+                        },
+                        "ResponseMetadata": {"HTTPStatusCode": resp.status},
+                    },
+                    "InvokeAgent",
+                )
 
-        # Create a unique ID for this supervisor session
-        # All subagent calls will use the same supervisor_id
-        supervisor_id = f"supervisor_{session_id}"
-
-        # Extract reasoning, invocations, observations
-        result = {
-            "agent": agent_label,
-            "status": "progress",
-            "supervisor_id": supervisor_id,  # Add supervisor ID for grouping
-        }  # Default status
-
-        # Add agent_call_id for all collaborator traces
-        if (
-            collaborator_name
-            and collaborator_name in self.collaborator_invocation_counts
-        ):
-            count = self.collaborator_invocation_counts[collaborator_name]
-            result["agent_call_id"] = f"{session_id}_{collaborator_name}_{count}"
-
-        # Check for failure traces first
-        if "failureTrace" in trace_data:
-            failure = trace_data["failureTrace"]
-            result["status"] = "failed"
-            result["failure_reason"] = failure.get("failureReason", "Unknown error")
-            logger.error(f"Agent failed: {result['failure_reason']}")
-            return result
-
-        if "orchestrationTrace" in trace_data:
-            orch = trace_data["orchestrationTrace"]
-            
-            # Log all available fields in orchestrationTrace
-            logger.info(f"OrchestrationTrace keys: {list(orch.keys())}")
-
-            # Reasoning
-            if "rationale" in orch and orch["rationale"].get("text"):
-                result["reasoning"] = orch["rationale"]["text"]
-                result["status"] = "progress"  # Reasoning indicates work in progress
-
-            # Collaborator invocation
-            if "invocationInput" in orch:
-                inv = orch["invocationInput"]
-                if inv.get("invocationType") == "AGENT_COLLABORATOR":
-                    collab_input = inv.get("agentCollaboratorInvocationInput", {})
-                    collab_name = collab_input.get("agentCollaboratorName")
-
-                    # Generate unique call ID for this collaborator invocation
-                    count = self.collaborator_invocation_counts.get(collab_name, 0) + 1
-                    self.collaborator_invocation_counts[collab_name] = count
-                    result["agent_call_id"] = f"{session_id}_{collab_name}_{count}"
-
-                    result["calling_collaborator"] = collab_name
-                    result["input_text"] = collab_input.get("input", {}).get("text")
-                    result["status"] = "started"  # Collaborator invocation started
-
-                elif inv.get("invocationType") == "ACTION_GROUP":
-                    # Handle action group invocation input
-                    action_input = inv.get("actionGroupInvocationInput", {})
-                    trace_id = inv.get("traceId")
-                    
-                    if trace_id and action_input:
-                        # Extract action group details
-                        action_group_name = action_input.get("actionGroupName", "Unknown Action Group")
-                        function_name = action_input.get("function", "Unknown Function")
-                        api_path = action_input.get("apiPath", "")
-                        verb = action_input.get("verb", "")
-                        execution_type = action_input.get("executionType", "LAMBDA")
-                        
-                        # Convert parameters array to dict for easier frontend display
-                        parameters = {}
-                        param_list = action_input.get("parameters", [])
-                        for param in param_list:
-                            if isinstance(param, dict) and "name" in param and "value" in param:
-                                parameters[param["name"]] = param["value"]
-                        
-                        # Store invocation details for later matching with observation
-                        self.action_group_invocations[trace_id] = {
-                            "actionGroupName": action_group_name,
-                            "function": function_name,
-                            "apiPath": api_path,
-                            "verb": verb,
-                            "executionType": execution_type,
-                            "parameters": parameters,
-                            "sessionId": session_id
-                        }
-                        
-                        # Create tool call entry with "calling" status
-                        result["tool_calls"] = result.get("tool_calls", [])
-                        result["tool_calls"].append({
-                            "type": "action_group",
-                            "name": action_group_name,
-                            "function": function_name,
-                            "status": "calling",
-                            "parameters": parameters,
-                            "api_path": api_path,
-                            "verb": verb,
-                            "trace_id": trace_id
-                        })
-                        
-                        logger.info(f"Action group invocation started: {action_group_name}.{function_name} (traceId: {trace_id})")
-
-                elif inv.get("invocationType") == "KNOWLEDGE_BASE":
-                    # Handle knowledge base lookup input
-                    kb_input = inv.get("knowledgeBaseLookupInput", {})
-                    trace_id = inv.get("traceId")
-                    
-                    if trace_id and kb_input:
-                        kb_id = kb_input.get("knowledgeBaseId", "unknown")
-                        query_text = kb_input.get("text", "")
-                        
-                        # Store KB invocation details
-                        self.action_group_invocations[trace_id] = {
-                            "knowledgeBaseId": kb_id,
-                            "query": query_text,
-                            "sessionId": session_id
-                        }
-                        
-                        # Create tool call entry
-                        result["tool_calls"] = result.get("tool_calls", [])
-                        result["tool_calls"].append({
-                            "type": "knowledge_base",
-                            "name": kb_id.replace("_", " ").title(),
-                            "status": "calling",
-                            "query": query_text,
-                            "trace_id": trace_id
-                        })
-                        
-                        logger.info(f"Knowledge base lookup started: {kb_id} (traceId: {trace_id})")
-
-            # Collaborator response
-            if "observation" in orch:
-                obs = orch["observation"]
-                if obs.get("type") == "AGENT_COLLABORATOR":
-                    collab_output = obs.get("agentCollaboratorInvocationOutput", {})
-                    collab_name = collab_output.get("agentCollaboratorName")
-
-                    result["collaborator_response"] = {
-                        "agent": collab_name,
-                        "output": collab_output.get("output", {}).get("text"),
-                    }
-                    result["status"] = "completed"  # Collaborator response received
-
-                    # Add agent_call_id for the completed collaborator
-                    if (
-                        collab_name
-                        and collab_name in self.collaborator_invocation_counts
-                    ):
-                        count = self.collaborator_invocation_counts[collab_name]
-                        result["agent_call_id"] = f"{session_id}_{collab_name}_{count}"
-
-                # Tool/Action Group invocations
-                elif obs.get("type") == "ACTION_GROUP":
-                    # Debug: log the full observation structure
-                    logger.info(f"ACTION_GROUP observation: {obs}")
-
-                    # AWS Bedrock uses actionGroupInvocationOutput (not actionGroupInvocation)
-                    action_inv = obs.get("actionGroupInvocationOutput", {})
-                    trace_id = obs.get("traceId")
-                    
-                    result["tool_calls"] = result.get("tool_calls", [])
-                    
-                    # Look up stored invocation details by traceId
-                    if trace_id and trace_id in self.action_group_invocations:
-                        stored_invocation = self.action_group_invocations[trace_id]
-                        
-                        # Extract output details
-                        output_text = action_inv.get("text", "")
-                        metadata = action_inv.get("metadata", {})
-                        execution_time_ms = metadata.get("totalTimeMs")
-                        client_request_id = metadata.get("clientRequestId")
-                        
-                        # Create completed tool call entry with all details
-                        tool_call = {
-                            "type": "action_group",
-                            "name": stored_invocation["actionGroupName"],
-                            "function": stored_invocation["function"],
-                            "status": "completed",
-                            "parameters": stored_invocation["parameters"],
-                            "api_path": stored_invocation["apiPath"],
-                            "verb": stored_invocation["verb"],
-                            "trace_id": trace_id,
-                            "result": f"Completed {stored_invocation['actionGroupName']}.{stored_invocation['function']}"
-                        }
-                        
-                        # Add optional fields if available
-                        if execution_time_ms is not None:
-                            tool_call["execution_time_ms"] = execution_time_ms
-                        if client_request_id:
-                            tool_call["client_request_id"] = client_request_id
-                        if output_text:
-                            tool_call["response"] = output_text
-                        
-                        result["tool_calls"].append(tool_call)
-                        
-                        # Clean up stored invocation
-                        del self.action_group_invocations[trace_id]
-                        
-                        logger.info(f"Action group completed: {stored_invocation['actionGroupName']}.{stored_invocation['function']} (traceId: {trace_id}, time: {execution_time_ms}ms)")
-                    else:
-                        # Fallback to old inference method if traceId not found
-                        output_text = action_inv.get("text", "")
-                        
-                        # Try to infer tool type from output content
-                        if "job" in output_text.lower() or "hiring" in output_text.lower():
-                            display_name = "Job Market Tools"
-                        elif (
-                            "course" in output_text.lower() or "cs " in output_text.lower()
-                        ):
-                            display_name = "Course Catalog Tools"
-                        elif (
-                            "project" in output_text.lower()
-                            or "github" in output_text.lower()
-                        ):
-                            display_name = "Project Tools"
-                        elif (
-                            "nebula" in output_text.lower()
-                            or "professor" in output_text.lower()
-                        ):
-                            display_name = "Nebula API Tools"
-                        else:
-                            display_name = "Lambda Tool"
-
-                        result["tool_calls"].append(
-                            {
-                                "type": "action_group",
-                                "name": display_name,
-                                "status": "completed",
-                                "result": f"Completed {display_name}",
-                            }
-                        )
-
-                # Knowledge Base lookups
-                elif obs.get("type") == "KNOWLEDGE_BASE":
-                    # Debug: log the full observation structure
-                    logger.info(f"KNOWLEDGE_BASE observation: {obs}")
-
-                    kb_output = obs.get("knowledgeBaseLookupOutput", {})
-                    trace_id = obs.get("traceId")
-                    
-                    result["tool_calls"] = result.get("tool_calls", [])
-                    
-                    # Look up stored KB invocation details by traceId
-                    if trace_id and trace_id in self.action_group_invocations:
-                        stored_invocation = self.action_group_invocations[trace_id]
-                        
-                        # Extract output details
-                        metadata = kb_output.get("metadata", {})
-                        execution_time_ms = metadata.get("totalTimeMs")
-                        client_request_id = metadata.get("clientRequestId")
-                        retrieved_references = kb_output.get("retrievedReferences", [])
-                        
-                        # Create completed KB tool call entry
-                        tool_call = {
-                            "type": "knowledge_base",
-                            "name": stored_invocation["knowledgeBaseId"].replace("_", " ").title(),
-                            "status": "completed",
-                            "query": stored_invocation["query"],
-                            "trace_id": trace_id,
-                            "result": f"Retrieved {len(retrieved_references)} references from {stored_invocation['knowledgeBaseId']}"
-                        }
-                        
-                        # Add optional fields if available
-                        if execution_time_ms is not None:
-                            tool_call["execution_time_ms"] = execution_time_ms
-                        if client_request_id:
-                            tool_call["client_request_id"] = client_request_id
-                        if retrieved_references:
-                            tool_call["references_count"] = len(retrieved_references)
-                        
-                        result["tool_calls"].append(tool_call)
-                        
-                        # Clean up stored invocation
-                        del self.action_group_invocations[trace_id]
-                        
-                        logger.info(f"Knowledge base lookup completed: {stored_invocation['knowledgeBaseId']} (traceId: {trace_id}, time: {execution_time_ms}ms, refs: {len(retrieved_references)})")
-                    else:
-                        # Fallback to old method if traceId not found
-                        raw_kb_name = (
-                            kb_output.get("knowledgeBaseName")
-                            or kb_output.get("knowledgeBaseId")
-                            or "knowledge_base"
-                        )
-
-                        # Map knowledge base names to more user-friendly display names
-                        kb_display_names = {
-                            "knowledge_base": "Knowledge Base",
-                            "course_catalog": "Course Catalog",
-                            "academic_database": "Academic Database",
-                        }
-
-                        display_name = kb_display_names.get(
-                            raw_kb_name, raw_kb_name.replace("_", " ").title()
-                        )
+            buffer = EventStreamBuffer()
+            async for data in resp.content.iter_any():
+                buffer.add_data(data)
+                for message in buffer:
+                    yield _decode_stream_message(message)
 
-                        result["tool_calls"].append(
-                            {
-                                "type": "knowledge_base",
-                                "name": display_name,
-                                "status": "completed",
-                                "result": f"Completed {display_name}",
-                            }
-                        )
+    async def _iter_completion(
+        self, invoke_params: Dict, backend: str
+    ) -> AsyncIterator[Dict]:
+        """Invoke the agent and iterate its completion event stream.
+
+        Bedrock reports throttling inside the event stream, which the SDK
+        retry policy never sees, so the call is retried here as long as no
+        event has been consumed yet. Each attempt holds an ``_inflight`` slot
+        for the life of its stream.
+        """
+        max_retries = 3
+        base_delay = 1
+
+        for attempt in range(max_retries):
+            if backend == "thread":
+                events = self._threaded_events(invoke_params)
+            elif backend == "http":
+                events = self._http_events(invoke_params)
+            else:
+                events = self._aio_events(invoke_params)
+            started = False
+            try:
+                async with self._inflight:
+                    async for event in events:
+                        started = True
+                        yield event
+                return
+            except ClientError as e:
+                if started or not _is_retryable(e) or attempt == max_retries - 1:
+                    raise
+                delay = base_delay * (2 ** attempt) + random.random() * 0.25
+                logger.warning(
+                    "Throttling detected, retrying in %.2f seconds (attempt %d/%d)",
+                    delay,
+                    attempt + 1,
+                    max_retries,
+                )
+                await asyncio.sleep(delay)
 
-        return result
+    @staticmethod
+    def _chunk_event(
+        text: str, session_id: str, pre_framed: bool
+    ) -> Union[Dict, bytes]:
+        """Wrap coalesced chunk text as a stream event."""
+        chunk_event = {"type": "chunk", "text": text, "session_id": session_id}
+        return _sse_frame(chunk_event) if pre_framed else chunk_event
 
     async def invoke_supervisor_stream(
         self,
         goal: str,
         session_id: str,
         user_context: Optional[Dict[str, str]] = None,
-    ) -> AsyncIterator[Dict]:
-        """Stream supervisor agent response as async generator."""
-        # Reset invocation counts for new request
-        self.collaborator_invocation_counts = {}
-        self.action_group_invocations = {}  # Reset action group tracking
+        pre_framed: bool = False,
+        backend: Optional[str] = None,
+    ) -> AsyncIterator[Union[Dict, bytes]]:
+        """Stream supervisor agent response as async generator.
+
+        With ``pre_framed=True`` each event is yielded as an encoded SSE frame
+        (bytes) instead of a dict. ``backend`` selects how the completion stream
+        is read ("aioboto3", "thread" or "http"); it defaults to the
+        AGENTCORE_STREAM_BACKEND setting.
+        """
+        if backend is None:
+            backend = _STREAM_BACKEND
+
+        # Per-stream tracking state; local so concurrent streams on the shared
+        # orchestrator never see each other's entries, and nothing outlives
+        # the stream when an observation never arrives
+        invocation_counts: Dict[str, int] = {}
+        ag_invocations: Dict[str, Dict] = {}  # Action group calls by traceId
 
         input_text = self._build_input_text(goal, user_context)
 
-        logger.info(f"Invoking AgentCore supervisor for session {session_id}")
+        logger.info("Invoking AgentCore supervisor for session %s", session_id)
 
-        # Create async Bedrock client
-        async with self.session.client(
-            "bedrock-agent-runtime", region_name=self.region
-        ) as runtime_client:
+        # Prepare invoke_agent parameters
+        invoke_params = {
+            "agentId": self.planner_id,
+            "agentAliasId": self.planner_alias_id,
+            "sessionId": session_id,
+            "inputText": input_text,
+            "enableTrace": True,
+        }
 
-            # Prepare invoke_agent parameters
-            invoke_params = {
-                "agentId": self.planner_id,
-                "agentAliasId": self.planner_alias_id,
-                "sessionId": session_id,
-                "inputText": input_text,
-                "enableTrace": True,
-            }
+        # Throttled invoke_agent calls are retried by the client's adaptive
+        # retry mode; in-stream throttling is retried by _iter_completion
+        completion = self._iter_completion(invoke_params, backend)
 
-            # Add retry logic with exponential backoff for throttling
-            max_retries = 3
-            base_delay = 1
-            
-            for attempt in range(max_retries):
-                try:
-                    response = await runtime_client.invoke_agent(**invoke_params)
-                    break
-                except Exception as e:
-                    if "throttlingException" in str(e) and attempt < max_retries - 1:
-                        delay = base_delay * (2 ** attempt)
-                        logger.warning(f"Throttling detected, retrying in {delay} seconds (attempt {attempt + 1}/{max_retries})")
-                        await asyncio.sleep(delay)
-                        continue
-                    else:
-                        raise
+        chunk_count = 0
+        trace_count = 0
 
-            chunk_count = 0
-            trace_count = 0
+        # Create a unique ID for this supervisor session
+        # All subagent calls will use the same supervisor_id
+        supervisor_id = f"supervisor_{session_id}"
+
+        # Consecutive chunks are coalesced and flushed by size or age, or
+        # before a trace / at stream end, so the client sees fewer events.
+        # The age bound is enforced with a timer: while text is buffered, the
+        # next event is awaited for at most the rest of the flush interval.
+        # The incremental decoder holds back a multi-byte character that is
+        # split across a flush boundary.
+        chunk_buf = bytearray()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        loop = asyncio.get_running_loop()
+        last_flush = loop.time()
+
+        # The next event is fetched as a task so the flush timer can expire
+        # without cancelling (and so breaking) the completion stream
+        pending: Optional[asyncio.Task] = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(_next_event(completion))
+                if chunk_buf:
+                    remaining = _CHUNK_FLUSH_SECONDS - (loop.time() - last_flush)
+                    done, _ = await asyncio.wait((pending,), timeout=max(remaining, 0))
+                    if not done:
+                        text = decoder.decode(chunk_buf)
+                        chunk_buf.clear()
+                        last_flush = loop.time()
+                        if text:
+                            yield self._chunk_event(text, session_id, pre_framed)
+                        continue
+                event = await pending
+                pending = None
+                if event is _STREAM_END:
+                    break
 
-            # ASYNC iteration - no blocking!
-            async for event in response["completion"]:
                 if "chunk" in event:
-                    text = event["chunk"]["bytes"].decode("utf-8")
                     chunk_count += 1
-                    yield {"type": "chunk", "text": text, "session_id": session_id}
+                    chunk_buf += event["chunk"]["bytes"]
+                    now = loop.time()
+                    if (
+                        len(chunk_buf) >= _CHUNK_FLUSH_BYTES
+                        or now - last_flush > _CHUNK_FLUSH_SECONDS
+                    ):
+                        text = decoder.decode(chunk_buf)
+                        chunk_buf.clear()
+                        last_flush = now
+                        if text:
+                            yield self._chunk_event(text, session_id, pre_framed)
 
                 elif "trace" in event:
                     trace_count += 1
+                    if chunk_buf:
+                        text = decoder.decode(chunk_buf)
+                        chunk_buf.clear()
+                        last_flush = loop.time()
+                        if text:
+                            yield self._chunk_event(text, session_id, pre_framed)
                     
                     # Log the RAW trace event for debugging
-                    logger.info(
-                        f"AgentCore TRACE #{trace_count} RAW: {event.get('trace', {})}"
-                    )
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "AgentCore TRACE #%d RAW: %s",
+                            trace_count,
+                            log_dump(event.get("trace", {})),
+                        )
                     
-                    trace_data = self._parse_trace_event(event, session_id)
-                    logger.info(
-                        f"AgentCore TRACE #{trace_count}: Full trace data: {trace_data}"
+                    trace = parse_trace_event(
+                        event,
+                        session_id,
+                        supervisor_id,
+                        invocation_counts,
+                        ag_invocations,
                     )
+                    if trace is None:
+                        continue
+
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "AgentCore TRACE #%d: %s",
+                            trace_count,
+                            log_dump(trace.to_dict()),
+                        )
 
                     # Only yield traces that have meaningful content
                     # Skip empty progress traces that have no reasoning, collaborator calls, or responses
-                    has_content = (
-                        "reasoning" in trace_data
-                        or "calling_collaborator" in trace_data
-                        or "collaborator_response" in trace_data
-                        or "tool_calls" in trace_data
-                    )
-
-                    if has_content:
-                        yield {
+                    if trace.has_content:
+                        trace_event = {
                             "type": "trace",
-                            "data": trace_data,
+                            "data": trace.to_dict(),
                             "session_id": session_id,
                         }
+                        yield _sse_frame(trace_event) if pre_framed else trace_event
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+        text = decoder.decode(chunk_buf, final=True)
+        if text:
+            yield self._chunk_event(text, session_id, pre_framed)
+
+        logger.info(
+            "Stream completed: %d chunks, %d traces", chunk_count, trace_count
+        )
+
+    def invoke_supervisor_stream_sync(
+        self,
+        goal: str,
+        session_id: str,
+        user_context: Optional[Dict[str, str]] = None,
+        pre_framed: bool = False,
+    ) -> AsyncIterator[Union[Dict, bytes]]:
+        """Stream the supervisor through the boto3 worker-thread backend."""
+        return self.invoke_supervisor_stream(
+            goal, session_id, user_context, pre_framed=pre_framed, backend="thread"
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_orchestrator() -> AgentCoreOrchestrator:
+    """Return the process-wide orchestrator, creating it on first use."""
+    return AgentCoreOrchestrator()
+
 
-            logger.info(f"Stream completed: {chunk_count} chunks, {trace_count} traces")
+# Shared orchestrator used by the FastAPI app.
+orchestrator = get_orchestrator()
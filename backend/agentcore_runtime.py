@@ -2,21 +2,22 @@
 
 from __future__ import annotations
 
+import asyncio
+import atexit
 import logging
 import os
-import textwrap
+import queue
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from contextlib import AsyncExitStack
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-import boto3
-from botocore.exceptions import ClientError
-
-try:
-    from dotenv import load_dotenv
-except ImportError:  # pragma: no cover - optional in some runtimes
-    load_dotenv = None  # type: ignore[assignment]
+# boto3/botocore and dotenv are imported lazily: AgentCore is off by default
+# and importing them costs far more than the rest of this module
 
 logger = logging.getLogger("career_guidance.agentcore")
 
@@ -30,12 +31,71 @@ def _default_region() -> str:
     )
 
 
+# Pooled keepalive connections let concurrent writers skip repeated TLS setup
+_CLIENT_CONFIG_KWARGS = dict(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 5},
+    connect_timeout=3,
+    read_timeout=10,
+)
+
+# Writer thread micro-batching: max queued record_events calls per pass and
+# how long to wait for more once one has arrived
+_WRITER_MAX_BATCH = 64
+_WRITER_BATCH_WAIT_SECONDS = 0.05
+
+# Session keys remembered for duplicate-text suppression
+_DEDUP_MAX_KEYS = 4096
+
+# Memories found by name, keyed by (region, name) -> (memory, time.monotonic())
+_MEMORY_CACHE_TTL_SECONDS = 60.0
+_memory_cache: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+
+_clients: Dict[Tuple[str, str], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(service: str, region: str):
+    """Build a boto3 client once per (service, region) and share it process-wide."""
+    key = (service, region)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                import boto3
+                from botocore.config import Config
+
+                client = boto3.client(service, region_name=region, config=Config(**_CLIENT_CONFIG_KWARGS))
+                _clients[key] = client
+    return client
+
+
+def _invalidate_client(service: str, region: str) -> None:
+    """Drop a cached client so the next _get_client call starts a fresh pool."""
+    with _clients_lock:
+        _clients.pop((service, region), None)
+
+
+def _sortable_id() -> str:
+    """32 hex chars: a 48-bit millisecond timestamp followed by 80 random bits.
+
+    IDs sort lexicographically by creation time. The random part still comes
+    from os.urandom since session IDs key memory reads.
+    """
+    return f"{time.time_ns() // 1_000_000:012x}{os.urandom(10).hex()}"
+
+
 def _truncate(text: str, *, limit: int = 1800) -> str:
     """Avoid pushing extremely long payloads into AgentCore memory."""
+    # Common case: short text with nothing to strip is returned as is
+    if len(text) <= limit and not (text[:1].isspace() or text[-1:].isspace()):
+        return text
     text = text.strip()
     if len(text) <= limit:
         return text
-    return textwrap.shorten(text, width=limit, placeholder=" …")
+    return text[: limit - 2].rstrip() + " …"
 
 
 @dataclass(frozen=True)
@@ -70,11 +130,21 @@ class AgentCoreRuntime:
         self._execution_role_arn = os.getenv("AGENTCORE_EXECUTION_ROLE_ARN", "").strip()
         self._event_expiry_days = int(os.getenv("AGENTCORE_EVENT_EXPIRY_DAYS", "90"))
         self._memory_id_override = os.getenv("AGENTCORE_MEMORY_ID", "").strip()
-
-        if load_dotenv is not None:
-            load_dotenv()
+        # Lists of (session key, truncated text, upper-cased role) drained by the writer thread
+        self._queue: "queue.Queue[List[Tuple[str, str, str]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        # Hash of the last text recorded per session key, least recent first
+        self._last_hash: "OrderedDict[str, int]" = OrderedDict()
+        self._dedup_lock = threading.Lock()
 
         if self._explicitly_enabled:
+            try:
+                from dotenv import load_dotenv
+            except ImportError:  # pragma: no cover - optional in some runtimes
+                pass
+            else:
+                load_dotenv()
             self._status_message = "AgentCore runtime initializing..."
             self._bootstrap()
 
@@ -98,47 +168,20 @@ class AgentCoreRuntime:
         return self._status_message
 
     def record_events(self, events: Sequence[AgentEvent]) -> None:
-        """Persist one or more events to AgentCore memory."""
+        """Queue one or more events for the background writer; never blocks on AWS."""
         if not events or not self.available:
             return
 
-        client = self._runtime_client
-        memory_id = self._memory_id
-        if client is None or memory_id is None:
+        items = self._event_items(events)
+        if not items:
             return
+        self._ensure_writer()
+        self._queue.put(items)
 
-        batches: Dict[str, List[Tuple[str, str]]] = {}
-        for event in events:
-            if not event.text:
-                continue
-            key = self._make_session_key(event.session_id, event.actor)
-            batches.setdefault(key, []).append((_truncate(event.text), event.role))
-
-        for key, messages in batches.items():
-            session_id, actor = key.split("::", 1)
-            try:
-                payload = []
-                for text, role in messages:
-                    payload.append(
-                        {
-                            "conversational": {
-                                "content": {"text": _truncate(text)},
-                                "role": role.upper(),
-                            }
-                        }
-                    )
-
-                client.create_event(
-                    memoryId=memory_id,
-                    actorId=actor,
-                    sessionId=session_id,
-                    eventTimestamp=datetime.utcnow(),
-                    payload=payload,
-                )
-            except Exception as exc:  # pragma: no cover - network dependent
-                logger.warning("Failed to persist AgentCore event (%s): %s", actor, exc)
-                self._available = False
-                self._status_message = f"AgentCore event write failed: {exc}"
+    def flush(self) -> None:
+        """Block until every queued event has been written (or dropped)."""
+        if self._writer is not None:
+            self._queue.join()
 
     def record_user_goal(self, session_id: str, goal: str) -> None:
         """Convenience for capturing the raw user request."""
@@ -170,9 +213,17 @@ class AgentCoreRuntime:
             ]
         )
 
-    def allocate_session(self) -> str:
-        """Generate a deterministic session identifier."""
-        return uuid.uuid4().hex
+    def invalidate_runtime_client(self):
+        """Replace the data-plane client after its connection pool failed."""
+        _invalidate_client("bedrock-agentcore", self.region)
+        self._runtime_client = _get_client("bedrock-agentcore", self.region)
+        return self._runtime_client
+
+    def allocate_session(self, *, rfc4122: bool = False) -> str:
+        """Generate a time-sortable session identifier (or a uuid4 hex on request)."""
+        if rfc4122:
+            return uuid.uuid4().hex
+        return _sortable_id()
 
     # ------------------------------------------------------------------ #
     # Internal helpers                                                   #
@@ -180,9 +231,11 @@ class AgentCoreRuntime:
 
     def _bootstrap(self) -> None:
         """Create shared memory constructs if AgentCore is reachable."""
+        from botocore.exceptions import ClientError
+
         try:
-            self._control_client = boto3.client("bedrock-agentcore-control", region_name=self.region)
-            self._runtime_client = boto3.client("bedrock-agentcore", region_name=self.region)
+            self._control_client = _get_client("bedrock-agentcore-control", self.region)
+            self._runtime_client = _get_client("bedrock-agentcore", self.region)
         except Exception as exc:  # pragma: no cover - network dependent
             logger.info("Unable to create AgentCore clients: %s", exc)
             self._status_message = f"Unable to initialize AgentCore clients: {exc}"
@@ -230,6 +283,7 @@ class AgentCoreRuntime:
             memory = response.get("memory", {})
             self._memory_id = memory.get("id") or memory.get("memoryId")
             if self._memory_id:
+                _memory_cache[(self.region, self.memory_name)] = (memory, time.monotonic())
                 self._available = True
                 self._status_message = f"Connected to AgentCore memory ({self._memory_id})."
                 logger.info(self._status_message)
@@ -259,21 +313,233 @@ class AgentCoreRuntime:
             self._status_message = f"Unable to initialize AgentCore memory: {exc}"
 
     def _find_memory_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        cached = _memory_cache.get((self.region, name))
+        if cached is not None and time.monotonic() - cached[1] < _MEMORY_CACHE_TTL_SECONDS:
+            return cached[0]
         if self._control_client is None:
             return None
         paginator = self._control_client.get_paginator("list_memories")
-        for page in paginator.paginate():
+        for page in paginator.paginate(PaginationConfig={"MaxItems": 500}):
             for memory in page.get("memories", []):
                 mem_name = memory.get("name") or memory.get("memoryName")
                 mem_id = memory.get("id") or memory.get("memoryId")
                 if mem_name == name or mem_id == name:
+                    _memory_cache[(self.region, name)] = (memory, time.monotonic())
                     return memory
         return None
 
+    def _ensure_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                writer = threading.Thread(
+                    target=self._drain_queue, name="agentcore-event-writer", daemon=True
+                )
+                writer.start()
+                self._writer = writer
+                atexit.register(self.flush)
+
+    def _drain_queue(self) -> None:
+        """Writer loop: micro-batch queued events and persist them per session and actor."""
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < _WRITER_MAX_BATCH:
+                    try:
+                        batch.append(self._queue.get(timeout=_WRITER_BATCH_WAIT_SECONDS))
+                    except queue.Empty:
+                        break
+
+                grouped: Dict[str, List[Tuple[str, str]]] = {}
+                for items in batch:
+                    for key, text, role in items:
+                        grouped.setdefault(key, []).append((text, role))
+                self._write_batches(grouped)
+            except Exception:  # pragma: no cover - keep the writer alive
+                logger.exception("AgentCore event writer failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batches(self, batches: Dict[str, List[Tuple[str, str]]]) -> None:
+        """Persist grouped events with one ``create_event`` call per session and actor."""
+        # Errors that usually mean the pooled connections went bad, not the request
+        from botocore.exceptions import ConnectionClosedError, EndpointConnectionError
+
+        client = self._runtime_client
+        memory_id = self._memory_id
+        if not self.available or client is None or memory_id is None:
+            for key, messages in batches.items():
+                self._forget_hashes(key, messages)
+            return
+
+        requests = self._event_requests(batches, memory_id)
+        for (key, messages), (actor, request) in zip(batches.items(), requests):
+            try:
+                try:
+                    client.create_event(**request)
+                except (ConnectionClosedError, EndpointConnectionError) as exc:  # pragma: no cover - network dependent
+                    # Retry once on a fresh pool before giving up on AgentCore
+                    logger.warning("AgentCore connection went stale (%s): %s", actor, exc)
+                    client = self.invalidate_runtime_client()
+                    client.create_event(**request)
+            except Exception as exc:  # pragma: no cover - network dependent
+                logger.warning("Failed to persist AgentCore event (%s): %s", actor, exc)
+                # Unwritten text must not be suppressed as a repeat later on
+                self._forget_hashes(key, messages)
+                self._available = False
+                self._status_message = f"AgentCore event write failed: {exc}"
+
+    def _event_items(self, events: Sequence[AgentEvent]) -> List[Tuple[str, str, str]]:
+        """(session key, truncated text, upper-cased role) for each event worth writing.
+
+        Empty events are dropped, as is any event whose text repeats the last
+        one recorded for the same session and actor. A write that fails forgets
+        its text again (see _forget_hashes), so a retry is not suppressed.
+        """
+        items = []
+        last_hash = self._last_hash
+        for event in events:
+            if not event.text:
+                continue
+            key = self._make_session_key(event.session_id, event.actor)
+            text = _truncate(event.text)
+            digest = hash(text)
+            with self._dedup_lock:
+                if last_hash.get(key) == digest:
+                    continue
+                last_hash[key] = digest
+                last_hash.move_to_end(key)
+                if len(last_hash) > _DEDUP_MAX_KEYS:
+                    last_hash.popitem(last=False)
+            items.append((key, text, event.role.upper()))
+        return items
+
+    def _forget_hashes(self, key: str, messages: List[Tuple[str, str]]) -> None:
+        """Drop the dedup entry for ``key`` if it came from one of ``messages``."""
+        digests = {hash(text) for text, _ in messages}
+        with self._dedup_lock:
+            if self._last_hash.get(key) in digests:
+                del self._last_hash[key]
+
+    @staticmethod
+    def _event_requests(
+        batches: Dict[str, List[Tuple[str, str]]], memory_id: str
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (actor, create_event kwargs) for each session/actor batch."""
+        # One timestamp for everything written in this pass
+        timestamp = datetime.now(timezone.utc)
+        for key, messages in batches.items():
+            session_id, actor = key.split("::", 1)
+            payload = []
+            for text, role in messages:
+                payload.append(
+                    {
+                        "conversational": {
+                            "content": {"text": text},
+                            "role": role,
+                        }
+                    }
+                )
+            yield actor, {
+                "memoryId": memory_id,
+                "actorId": actor,
+                "sessionId": session_id,
+                "eventTimestamp": timestamp,
+                "payload": payload,
+            }
+
     @staticmethod
     def _make_session_key(session_id: str, actor: str) -> str:
         return f"{session_id}::{actor or 'agent'}"
 
 
+class AgentCoreRuntimeAsync(AgentCoreRuntime):
+    """AgentCoreRuntime for asyncio callers: writes await aiobotocore directly.
+
+    Setup still goes through the synchronous control-plane client once. The
+    record_* methods are coroutines, otherwise matching the sync class.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._async_client = None
+        self._async_stack: Optional[AsyncExitStack] = None
+        self._async_lock = asyncio.Lock()
+
+    async def record_events(self, events: Sequence[AgentEvent]) -> None:  # type: ignore[override]
+        """Persist one or more events, one ``create_event`` per session and actor."""
+        if not events or not self.available or self._memory_id is None:
+            return
+
+        batches: Dict[str, List[Tuple[str, str]]] = {}
+        for key, text, role in self._event_items(events):
+            batches.setdefault(key, []).append((text, role))
+        if not batches:
+            return
+
+        client = await self._get_async_client()
+        requests = self._event_requests(batches, self._memory_id)
+        for (key, messages), (actor, request) in zip(batches.items(), requests):
+            try:
+                await client.create_event(**request)
+            except Exception as exc:  # pragma: no cover - network dependent
+                logger.warning("Failed to persist AgentCore event (%s): %s", actor, exc)
+                # Unwritten text must not be suppressed as a repeat later on
+                self._forget_hashes(key, messages)
+                self._available = False
+                self._status_message = f"AgentCore event write failed: {exc}"
+
+    async def record_user_goal(self, session_id: str, goal: str) -> None:  # type: ignore[override]
+        """Convenience for capturing the raw user request."""
+        if not goal or not self.available:
+            return
+        await self.record_events(
+            [AgentEvent(session_id=session_id, actor="Student", role="USER", text=goal)]
+        )
+
+    async def record_agent_output(  # type: ignore[override]
+        self, session_id: str, agent_name: str, text: str
+    ) -> None:
+        """Persist an individual agent's response."""
+        if not text or not self.available:
+            return
+        await self.record_events(
+            [AgentEvent(session_id=session_id, actor=agent_name, role="ASSISTANT", text=text)]
+        )
+
+    async def flush(self) -> None:  # type: ignore[override]
+        """Writes are awaited inline, so there is never anything pending."""
+
+    async def aclose(self) -> None:
+        """Close the long-lived aiobotocore client."""
+        async with self._async_lock:
+            if self._async_stack is not None:
+                await self._async_stack.aclose()
+            self._async_stack = None
+            self._async_client = None
+
+    async def _get_async_client(self):
+        """Open the aiobotocore client once and keep it for the process lifetime."""
+        if self._async_client is not None:
+            return self._async_client
+        async with self._async_lock:
+            if self._async_client is None:
+                from aiobotocore.config import AioConfig
+                from aiobotocore.session import get_session
+
+                stack = AsyncExitStack()
+                self._async_client = await stack.enter_async_context(
+                    get_session().create_client(
+                        "bedrock-agentcore",
+                        region_name=self.region,
+                        config=AioConfig(**_CLIENT_CONFIG_KWARGS),
+                    )
+                )
+                self._async_stack = stack
+        return self._async_client
+
+
 # Shared runtime used by the Flask app.
 runtime = AgentCoreRuntime()
@@ -4,12 +4,14 @@ Automated Lambda deployment for UTD Catalog Browser tools
 """
 
 import boto3
+import mmap
 import os
 import zipfile
 import shutil
 import subprocess
 import sys
 import json
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -23,11 +25,29 @@ os.environ["AWS_ACCESS_KEY_ID"] = os.getenv("AWS_ACCESS_KEY_ID", "")
 os.environ["AWS_SECRET_ACCESS_KEY"] = os.getenv("AWS_SECRET_ACCESS_KEY", "")
 os.environ["AWS_REGION"] = os.getenv("AWS_REGION", "us-east-1")
 
-lambda_client = boto3.client("lambda", region_name=os.getenv("AWS_REGION", "us-east-1"))
-iam_client = boto3.client("iam", region_name=os.getenv("AWS_REGION", "us-east-1"))
-
+REGION = os.getenv("AWS_REGION", "us-east-1")
 FUNCTION_NAME = "UTD_CatalogBrowser"
 ROLE_NAME = "AgentCoreMemoryRole"
+# Environment the function needs; fetch the main catalog at init so cold
+# starts serve it warm
+FUNCTION_ENVIRONMENT = {"PREFETCH_CATALOG_ON_INIT": "1"}
+# Installed-package paths left out of the deployment ZIP (plus dist-info RECORDs)
+PRUNE_DIRS = frozenset({"__pycache__", "tests", "test"})
+PRUNE_SUFFIXES = (".pyc", ".so.debug")
+# Largest ZIP Lambda accepts inline; bigger packages need LAMBDA_DEPLOY_BUCKET
+INLINE_ZIP_LIMIT = 50 * 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def _get_client(service, region=REGION):
+    """Create each boto3 client on first use and reuse it afterwards"""
+    return boto3.client(service, region_name=region)
+
+
+@lru_cache(maxsize=1)
+def _get_account_id():
+    """Look up the caller's AWS account id once per process"""
+    return os.getenv("AWS_ACCOUNT_ID") or _get_client("sts").get_caller_identity()["Account"]
 
 
 def get_lambda_role():
@@ -49,6 +69,7 @@ def get_lambda_role():
         return role_arn
 
     # Use the default role name
+    iam_client = _get_client("iam")
     try:
         response = iam_client.get_role(RoleName=ROLE_NAME)
         role_arn = response["Role"]["Arn"]
@@ -63,6 +84,18 @@ def get_lambda_role():
         sys.exit(1)
 
 
+def _package_files(package_dir):
+    """Yield (path, arcname) for every file that belongs in the ZIP, skipping pruned subtrees"""
+    for root, dirs, files in os.walk(package_dir):
+        dirs[:] = [d for d in dirs if d not in PRUNE_DIRS]
+        in_dist_info = root.endswith(".dist-info")
+        for file in files:
+            if file.endswith(PRUNE_SUFFIXES) or (in_dist_info and file == "RECORD"):
+                continue
+            file_path = os.path.join(root, file)
+            yield file_path, os.path.relpath(file_path, package_dir)
+
+
 def create_deployment_package():
     """Create Lambda deployment ZIP file"""
     print("\nCreating deployment package...")
@@ -86,6 +119,7 @@ def create_deployment_package():
             "-t",
             package_dir,
             "--quiet",
+            "--no-compile",  # Lambda compiles on import; .pyc files only bloat the ZIP
         ],
         check=True,
     )
@@ -98,11 +132,22 @@ def create_deployment_package():
     if os.path.exists(zip_path):
         os.remove(zip_path)
 
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(package_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, package_dir)
+    # Level 1 deflate is several times faster and barely larger on pip artifacts;
+    # prefer the native zip tool when it is installed
+    zip_tool = shutil.which("zip")
+    if zip_tool:
+        # Feed the filtered file list to zip on stdin
+        names = "\n".join(arcname for _, arcname in _package_files(package_dir))
+        subprocess.run(
+            [zip_tool, "-1", "-q", os.path.abspath(zip_path), "-@"],
+            cwd=package_dir,
+            input=names,
+            text=True,
+            check=True,
+        )
+    else:
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+            for file_path, arcname in _package_files(package_dir):
                 zipf.write(file_path, arcname)
 
     # Cleanup
@@ -116,9 +161,22 @@ def deploy_lambda_function(role_arn, zip_path):
     """Deploy or update Lambda function"""
     print("\nDeploying Lambda function...")
 
-    with open(zip_path, "rb") as f:
-        zip_content = f.read()
+    # Packages over the inline upload limit go through S3 (streamed in parts)
+    bucket = os.getenv("LAMBDA_DEPLOY_BUCKET")
+    if bucket and os.path.getsize(zip_path) > INLINE_ZIP_LIMIT:
+        key = f"{FUNCTION_NAME}/{os.path.basename(zip_path)}"
+        print(f"  Uploading package to s3://{bucket}/{key}...")
+        _get_client("s3").upload_file(zip_path, bucket, key)
+        return _create_or_update_function(role_arn, {"S3Bucket": bucket, "S3Key": key})
+
+    # Map the ZIP instead of copying it into a bytes object
+    with open(zip_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as zip_content:
+        return _create_or_update_function(role_arn, {"ZipFile": zip_content})
 
+
+def _create_or_update_function(role_arn, code):
+    """Create the function, or update its code if it already exists"""
+    lambda_client = _get_client("lambda")
     try:
         # Try to create new function
         response = lambda_client.create_function(
@@ -126,13 +184,11 @@ def deploy_lambda_function(role_arn, zip_path):
             Runtime="python3.11",
             Role=role_arn,
             Handler="lambda_catalog_browser.lambda_handler",
-            Code={"ZipFile": zip_content},
+            Code=code,
             Timeout=60,  # 60 seconds for web scraping
             MemorySize=512,
             Description="UTD Course Catalog browser for Bedrock agents",
-            Environment={
-                "Variables": {}
-            },
+            Environment={"Variables": dict(FUNCTION_ENVIRONMENT)},
         )
         function_arn = response["FunctionArn"]
         print(f"✓ Created Lambda function: {function_arn}")
@@ -141,12 +197,24 @@ def deploy_lambda_function(role_arn, zip_path):
         # Function exists, update it
         print("  Function exists, updating code...")
         response = lambda_client.update_function_code(
-            FunctionName=FUNCTION_NAME, ZipFile=zip_content
+            FunctionName=FUNCTION_NAME, **code
         )
 
         function_arn = response["FunctionArn"]
         print(f"✓ Updated Lambda function: {function_arn}")
 
+        # Functions created before a variable was introduced never got it;
+        # add the missing ones, keeping whatever else is already set
+        variables = response.get("Environment", {}).get("Variables", {})
+        if any(variables.get(k) != v for k, v in FUNCTION_ENVIRONMENT.items()):
+            # Configuration changes are rejected while a code update is in progress
+            lambda_client.get_waiter("function_updated").wait(FunctionName=FUNCTION_NAME)
+            lambda_client.update_function_configuration(
+                FunctionName=FUNCTION_NAME,
+                Environment={"Variables": {**variables, **FUNCTION_ENVIRONMENT}},
+            )
+            print("✓ Updated function environment")
+
     return function_arn
 
 
@@ -154,8 +222,9 @@ def add_bedrock_permission(function_arn):
     """Add permission for Bedrock to invoke Lambda"""
     print("\nAdding Bedrock invoke permission...")
 
-    account_id = boto3.client("sts").get_caller_identity()["Account"]
+    account_id = _get_account_id()
 
+    lambda_client = _get_client("lambda")
     try:
         lambda_client.add_permission(
             FunctionName=FUNCTION_NAME,
@@ -5,74 +5,201 @@ Handles web scraping of UTD catalog pages to get degree requirements and course
 """
 
 import json
+import orjson
 import os
 import requests
-from bs4 import BeautifulSoup
+import soupsieve
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+from selectolax.lexbor import LexborHTMLParser
 from typing import Dict, List, Optional, Tuple
 import logging
 import re
+import time
 from urllib.parse import urljoin, urlparse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_catalog_page(url: str) -> Tuple[Optional[BeautifulSoup], str]:
-    """Fetch and parse a catalog page"""
+# Shared keep-alive session, reused across warm invocations and fetch threads
+SESSION = requests.Session()
+SESSION.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+})
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Upper bound on program pages fetched in parallel
+MAX_FETCH_WORKERS = 8
+
+# Course codes like CS 1200, MATH 2413, etc.
+_COURSE_CODE_RE = re.compile(r'\b([A-Z]{2,4})\s+(\d{4})\b')
+# Credit totals like "124 semester credit hours"
+_CREDIT_RE = re.compile(r"(\d+)\s+(?:semester\s+)?credit\s+hours", re.IGNORECASE)
+
+# Base catalog URL
+CATALOG_URL = "https://catalog.utdallas.edu/2025/undergraduate/programs/"
+
+# Parsed main catalog page; lives as long as the Lambda execution environment
+MAIN_CATALOG_TTL_SECONDS = 3600
+_MAIN_CATALOG_CACHE = {"soup": None, "ts": 0.0}
+# Lowercased links of the most recently searched page (see _link_index)
+_LINK_INDEX_CACHE = {"soup": None, "links": []}
+
+# The main catalog page is just searched for program links, so only its
+# anchors are parsed (program pages go through get_program_text instead)
+MAIN_CATALOG_STRAINER = SoupStrainer("a", href=True)
+
+# Content blocks that hold a program's degree requirements, most specific first
+REQUIREMENT_SELECTORS = (
+    "div.curriculum",
+    "div#requirements",
+    "section#requirements",
+    "div.degree-requirements",
+    "div.program-requirements",
+)
+# One selector list so the tree is matched in a single pass (first hit in
+# document order)
+REQUIREMENT_SELECTOR = ", ".join(REQUIREMENT_SELECTORS)
+# Compiled once per container instead of on every BeautifulSoup select_one call
+_REQUIREMENT_SEL = soupsieve.compile(REQUIREMENT_SELECTOR)
+_MAIN_SEL = soupsieve.compile("main")
+
+# Read size for streamed page downloads
+FETCH_CHUNK_SIZE = 64 * 1024
+
+# Validators and body of each fetched page: url -> (etag, content, last_modified)
+_URL_CACHE: Dict[str, Tuple[str, bytes, str]] = {}
+# Parsed pages: (url, strainer) -> (content the soup was built from, soup)
+_SOUP_CACHE: Dict[Tuple[str, Optional[SoupStrainer]], Tuple[bytes, BeautifulSoup]] = {}
+
+def fetch_catalog_html(url: str) -> Tuple[Optional[bytes], str]:
+    """Download a catalog page and return its raw HTML.
+
+    Pages seen before are revalidated with a conditional GET; on 304 the cached
+    body is returned without downloading it again.
+    """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-        }
-        
         logger.info(f"Fetching URL: {url}")
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        return soup, "Success"
+        cached = _URL_CACHE.get(url)
+        headers = {}
+        if cached:
+            etag, _, last_modified = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        # Stream the body so a 304 or an error status never downloads one, and
+        # the connection goes back to the pool as soon as the page is read
+        with SESSION.get(url, headers=headers, timeout=30, stream=True) as response:
+            if response.status_code == 304 and cached:
+                return cached[1], "Success"
+            response.raise_for_status()
+            content = b"".join(response.iter_content(chunk_size=FETCH_CHUNK_SIZE))
+        etag = response.headers.get("ETag", "")
+        last_modified = response.headers.get("Last-Modified", "")
+        if etag or last_modified:
+            _URL_CACHE[url] = (etag, content, last_modified)
+        return content, "Success"
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Request error for {url}: {str(e)}")
         return None, f"Request error: {str(e)}"
+
+def get_catalog_page(url: str, strainer: Optional[SoupStrainer] = None) -> Tuple[Optional[BeautifulSoup], str]:
+    """Fetch and parse a catalog page, optionally restricted to a strainer"""
+    content, message = fetch_catalog_html(url)
+    if content is None:
+        return None, message
+    # A 304 hands back the very same bytes, so the earlier parse is still valid
+    cached = _SOUP_CACHE.get((url, strainer))
+    if cached and cached[0] is content:
+        return cached[1], "Success"
+    try:
+        soup = BeautifulSoup(content, 'lxml', parse_only=strainer)
+        if url in _URL_CACHE:
+            _SOUP_CACHE[(url, strainer)] = (content, soup)
+        return soup, "Success"
+    except Exception as e:
+        logger.error(f"Error parsing {url}: {str(e)}")
+        return None, f"Parsing error: {str(e)}"
+
+def get_program_text(url: str) -> Tuple[Optional[str], str]:
+    """Fetch a program page and return the text of its requirements section.
+
+    Only the text is needed here, so the page goes through selectolax's Lexbor
+    parser rather than building a BeautifulSoup tree. The text is scoped to the
+    same container parse_degree_requirements reads, which keeps navigation and
+    footer boilerplate out of the agent response.
+    """
+    content, message = fetch_catalog_html(url)
+    if content is None:
+        return None, message
+    try:
+        tree = LexborHTMLParser(content)
+        root = tree.css_first(REQUIREMENT_SELECTOR) or tree.css_first("main") or tree.body or tree.root
+        text = root.text(separator=" ", strip=True) if root is not None else ""
+        # Collapse the gaps left by whitespace-only text nodes
+        return " ".join(text.split()), "Success"
     except Exception as e:
         logger.error(f"Error parsing {url}: {str(e)}")
         return None, f"Parsing error: {str(e)}"
 
+def _get_main_catalog() -> Tuple[Optional[BeautifulSoup], str]:
+    """Return the parsed main catalog page, refetching once it is older than the TTL"""
+    now = time.monotonic()
+    if _MAIN_CATALOG_CACHE["soup"] is not None and now - _MAIN_CATALOG_CACHE["ts"] < MAIN_CATALOG_TTL_SECONDS:
+        return _MAIN_CATALOG_CACHE["soup"], "Success"
+    soup, message = get_catalog_page(CATALOG_URL, MAIN_CATALOG_STRAINER)
+    if soup is not None:
+        _MAIN_CATALOG_CACHE["soup"] = soup
+        _MAIN_CATALOG_CACHE["ts"] = now
+    return soup, message
+
+def _link_index(soup: BeautifulSoup) -> List[Tuple[str, str, str]]:
+    """Return (href, lowercased "href\ntext", lowercased text) for every link.
+
+    Built once per parsed page, so looking up several majors against the cached
+    main catalog does not re-extract and re-lowercase every anchor each time.
+    Patterns never contain a newline, so a substring test on the joined string
+    is the same as testing href and text separately.
+    """
+    if _LINK_INDEX_CACHE["soup"] is not soup:
+        links = []
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            text = link.get_text().lower()
+            links.append((href, f"{href.lower()}\n{text}", text))
+        _LINK_INDEX_CACHE["soup"] = soup
+        _LINK_INDEX_CACHE["links"] = links
+    return _LINK_INDEX_CACHE["links"]
+
 def find_program_link(soup: BeautifulSoup, major_name: str, degree_type: str) -> Optional[str]:
     """Find the link to a specific program page"""
     try:
-        # Look for links that contain the major name and degree type
-        links = soup.find_all('a', href=True)
-        
+        major = major_name.lower()
+        degree = degree_type.lower()
         # Common patterns for program links
-        patterns = [
-            f"{major_name.lower()}",
-            f"{major_name.lower().replace(' ', '-')}",
-            f"{major_name.lower().replace(' ', '_')}",
-        ]
-        
-        for link in links:
-            href = link.get('href', '').lower()
-            text = link.get_text().lower()
-            
-            # Check if link text or href contains the major name
-            for pattern in patterns:
-                if pattern in href or pattern in text:
-                    # Check if degree type is mentioned
-                    if degree_type.lower() in text or degree_type.lower() in href:
-                        return urljoin("https://catalog.utdallas.edu/2025/undergraduate/programs/", link['href'])
-        
-        # Fallback: look for any link that might be the program
-        for link in links:
-            href = link.get('href', '').lower()
-            text = link.get_text().lower()
-            if major_name.lower() in text and ('bs' in text or 'ba' in text or 'bachelor' in text):
-                return urljoin("https://catalog.utdallas.edu/2025/undergraduate/programs/", link['href'])
-        
+        patterns = {major, major.replace(' ', '-'), major.replace(' ', '_')}
+
+        # Single pass: a link naming both the major and the degree type wins
+        # immediately; otherwise remember the first plausible bachelor's link
+        fallback = None
+        for href, haystack, text in _link_index(soup):
+            if degree in haystack and any(p in haystack for p in patterns):
+                return urljoin(CATALOG_URL, href)
+            if fallback is None and major in text and ('bs' in text or 'ba' in text or 'bachelor' in text):
+                fallback = href
+
+        if fallback is not None:
+            return urljoin(CATALOG_URL, fallback)
         return None
         
     except Exception as e:
@@ -81,14 +208,17 @@ def find_program_link(soup: BeautifulSoup, major_name: str, degree_type: str) ->
 
 def extract_course_codes(text: str) -> List[str]:
     """Extract course codes from text (e.g., CS 1200, MATH 2413)"""
-    # Pattern to match course codes like CS 1200, MATH 2413, etc.
-    pattern = r'\b([A-Z]{2,4})\s+(\d{4})\b'
-    matches = re.findall(pattern, text)
+    matches = _COURSE_CODE_RE.findall(text)
     return [f"{subject} {number}" for subject, number in matches]
 
-def parse_degree_requirements(soup: BeautifulSoup) -> Dict:
+def _get_requirements_container(soup: BeautifulSoup):
+    """Return the element holding the degree requirements, falling back to the
+    main content area (or the whole document) when none is marked up"""
+    return _REQUIREMENT_SEL.select_one(soup) or _MAIN_SEL.select_one(soup) or soup
+
+def parse_degree_requirements(soup: BeautifulSoup, course_links_only: bool = False) -> Dict:
     """Parse degree requirements from a program page using scoped selectors and
-    robust extraction of course codes from course links and nearby text.
+    a single sweep for course codes over the requirements text.
 
     We avoid building a prerequisite graph from HTML; authoritative prereqs are
     validated via Nebula elsewhere.
@@ -105,53 +235,31 @@ def parse_degree_requirements(soup: BeautifulSoup) -> Dict:
 
     try:
         # Scope: curriculum/requirements content blocks
-        requirement_selectors = [
-            "div.curriculum",
-            "div#requirements",
-            "section#requirements",
-            "div.degree-requirements",
-            "div.program-requirements",
-        ]
+        container = _get_requirements_container(soup)
+        if container is soup:
+            # No curriculum markup at all: the structured extractions would
+            # scan the whole page for mostly noise, so only sweep the text
+            logger.warning("No requirements container found; extracting course codes only")
+            text = (soup.body or soup).get_text(" ")
+            requirements["required_courses"] = list(dict.fromkeys(extract_course_codes(text)))
+            return requirements
+
+        # Course codes: one regex sweep over the container text. Stray codes in
+        # prose are accepted in exchange for not walking every anchor; set
+        # course_links_only to read just the links that point at course pages.
+        # Dict keys dedupe while preserving first-seen order.
+        seen: Dict[str, None] = {}
+        if course_links_only:
+            for a in container.find_all("a", href=True):
+                if "/courses/" in a["href"]:
+                    for m in _COURSE_CODE_RE.finditer(a.get_text(" ")):
+                        seen[f"{m.group(1)} {m.group(2)}"] = None
 
-        container = None
-        for selector in requirement_selectors:
-            el = soup.select_one(selector)
-            if el:
-                container = el
-                break
-
-        if not container:
-            # Fallback to main content area to avoid scanning the whole page
-            container = soup.select_one("main") or soup
-
-        # Strategy to gather course codes:
-        # 1) Prefer anchors linking to course pages
-        # 2) Fallback to text within requirement container
-        course_codes: List[str] = []
-
-        # 1) Extract from course links
-        for a in container.find_all("a", href=True):
-            href = a["href"].strip()
-            if "/courses/" in href:
-                text = a.get_text(" ").strip()
-                found = extract_course_codes(text)
-                for code in found:
-                    course_codes.append(code)
-
-        # 2) Fallback: extract from scoped text (avoid entire page to reduce noise)
-        if not course_codes:
-            text_content = container.get_text(" ")
-            course_codes.extend(extract_course_codes(text_content))
-
-        # Deduplicate while preserving order
-        seen = set()
-        deduped: List[str] = []
-        for code in course_codes:
-            if code not in seen:
-                seen.add(code)
-                deduped.append(code)
-
-        requirements["required_courses"] = deduped
+        if not seen:
+            for m in _COURSE_CODE_RE.finditer(container.get_text(" ")):
+                seen[f"{m.group(1)} {m.group(2)}"] = None
+
+        requirements["required_courses"] = list(seen)
 
         # Total credits: Look for headings/paragraphs with "semester credit hours"
         credits_text_candidates: List[str] = []
@@ -160,9 +268,8 @@ def parse_degree_requirements(soup: BeautifulSoup) -> Dict:
             if "credit" in t.lower():
                 credits_text_candidates.append(t)
         credit_val: Optional[int] = None
-        credit_pattern = re.compile(r"(\d+)\s+(?:semester\s+)?credit\s+hours", re.IGNORECASE)
         for t in credits_text_candidates:
-            m = credit_pattern.search(t)
+            m = _CREDIT_RE.search(t)
             if m:
                 try:
                     n = int(m.group(1))
@@ -172,18 +279,26 @@ def parse_degree_requirements(soup: BeautifulSoup) -> Dict:
                     pass
         requirements["total_credits"] = credit_val
 
-        # Track options: capture headings mentioning common keywords
+        # Track options: capture headings mentioning common keywords, together
+        # with up to 5 lists/paragraphs that follow them before the next
+        # heading. One document-order walk instead of find_all_next per heading.
         track_keywords = ["track", "specialization", "concentration", "option", "emphasis"]
-        for hdr in container.find_all(["h3", "h4", "h5"]):
-            title = hdr.get_text(" ").strip()
-            if any(k in title.lower() for k in track_keywords):
-                # Collect nearby list items or paragraph under the heading
-                block_text = []
-                for sib in hdr.find_all_next(["ul", "ol", "p"], limit=5):
-                    block_text.append(sib.get_text(" "))
-                codes = extract_course_codes("\n".join(block_text))
-                if codes:
-                    requirements["track_options"].append({"name": title, "courses": list(dict.fromkeys(codes))})
+        tracks: List[Tuple[str, List[str]]] = []
+        block_text: Optional[List[str]] = None
+        for el in container.find_all(["h3", "h4", "h5", "ul", "ol", "p"]):
+            if el.name in ("h3", "h4", "h5"):
+                title = el.get_text(" ").strip()
+                if any(k in title.lower() for k in track_keywords):
+                    block_text = []
+                    tracks.append((title, block_text))
+                else:
+                    block_text = None
+            elif block_text is not None and len(block_text) < 5:
+                block_text.append(el.get_text(" "))
+        for title, block_text in tracks:
+            codes = extract_course_codes("\n".join(block_text))
+            if codes:
+                requirements["track_options"].append({"name": title, "courses": list(dict.fromkeys(codes))})
 
         # Do not populate prerequisites from HTML; leave empty.
         requirements["prerequisites"] = {}
@@ -208,11 +323,10 @@ def get_information(majors: Dict[str, str], minors: Dict[str, str] = None) -> Tu
     try:
         logger.info(f"Getting information for majors: {majors}, minors: {minors}")
         
-        # Base catalog URL
-        catalog_url = "https://catalog.utdallas.edu/2025/undergraduate/programs/"
+        catalog_url = CATALOG_URL
         
-        # Fetch main catalog page
-        soup, error_msg = get_catalog_page(catalog_url)
+        # Main catalog page, cached across warm invocations
+        soup, error_msg = _get_main_catalog()
         if not soup:
             return ({}, f"Failed to fetch catalog page: {error_msg}")
         
@@ -223,16 +337,17 @@ def get_information(majors: Dict[str, str], minors: Dict[str, str] = None) -> Tu
             "timestamp": None
         }
         
-        # Process each major
+        # Find every program link on the main catalog page first
+        program_urls = {}
         for major_name, degree_type in majors.items():
             logger.info(f"Processing major: {major_name} {degree_type}")
+            key = f"{major_name} {degree_type}"
             
-            # Find the program link
             program_url = find_program_link(soup, major_name, degree_type)
             
             if not program_url:
                 logger.warning(f"Could not find program link for {major_name} {degree_type}")
-                result["majors"][f"{major_name} {degree_type}"] = {
+                result["majors"][key] = {
                     "error": f"Program page not found for {major_name} {degree_type}",
                     "url": None,
                     "requirements": {}
@@ -240,23 +355,31 @@ def get_information(majors: Dict[str, str], minors: Dict[str, str] = None) -> Tu
                 continue
             
             logger.info(f"Found program URL: {program_url}")
+            result["majors"][key] = None  # Keeps the requested order
+            program_urls[key] = program_url
+        
+        # Then fetch the program pages concurrently
+        if program_urls:
+            workers = min(MAX_FETCH_WORKERS, len(program_urls))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pages = dict(zip(program_urls, executor.map(get_program_text, program_urls.values())))
             
-            # Fetch the program page
-            program_soup, program_error = get_catalog_page(program_url)
-            if not program_soup:
-                result["majors"][f"{major_name} {degree_type}"] = {
-                    "error": f"Failed to fetch program page: {program_error}",
+            for key, program_url in program_urls.items():
+                program_text, program_error = pages[key]
+                if program_text is None:
+                    result["majors"][key] = {
+                        "error": f"Failed to fetch program page: {program_error}",
+                        "url": program_url,
+                        "requirements": {}
+                    }
+                    continue
+                
+                result["majors"][key] = {
                     "url": program_url,
-                    "requirements": {}
+                    # Return the raw text content of the program page as requested
+                    "raw_text": program_text,
+                    "error": None
                 }
-                continue
-            
-            result["majors"][f"{major_name} {degree_type}"] = {
-                "url": program_url,
-                # Return the raw text content of the program page as requested
-                "raw_text": program_soup.get_text(" ", strip=True),
-                "error": None
-            }
         
         # Process minors if provided
         if minors:
@@ -284,6 +407,11 @@ def get_information(majors: Dict[str, str], minors: Dict[str, str] = None) -> Tu
         logger.error(f"Error in get_information: {str(e)}")
         return ({}, f"Error retrieving catalog information: {str(e)}")
 
+# Warm the main catalog during the Lambda init phase, so the first invocation
+# finds it already fetched and parsed. Opt-in because init time is capped.
+if os.getenv("PREFETCH_CATALOG_ON_INIT") == "1" and os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+    _get_main_catalog()
+
 def lambda_handler(event, context):
     """
     AWS Lambda handler for Bedrock Agent action group.
@@ -298,7 +426,7 @@ def lambda_handler(event, context):
         ]
     }
     """
-    print(f"Received event: {json.dumps(event)}")
+    print(f"Received event: {orjson.dumps(event).decode()}")
     
     # Extract action group and function from event
     action_group = event.get("actionGroup", "")
@@ -316,10 +444,10 @@ def lambda_handler(event, context):
             if param_name in ["majors", "minors"]:
                 try:
                     if isinstance(param_value, str):
-                        parameters[param_name] = json.loads(param_value)
+                        parameters[param_name] = orjson.loads(param_value)
                     else:
                         parameters[param_name] = param_value
-                except json.JSONDecodeError as e:
+                except orjson.JSONDecodeError as e:
                     logger.error(f"Failed to parse JSON for {param_name}: {str(e)}")
                     parameters[param_name] = {}
             else:
@@ -341,7 +469,7 @@ def lambda_handler(event, context):
                 "actionGroup": action_group,
                 "function": function_name,
                 "functionResponse": {
-                    "responseBody": {"TEXT": {"body": json.dumps({"result": result, "summary": summary})}}
+                    "responseBody": {"TEXT": {"body": orjson.dumps({"result": result, "summary": summary}).decode()}}
                 },
             },
         }
@@ -354,7 +482,7 @@ def lambda_handler(event, context):
                 "function": function_name,
                 "functionResponse": {
                     "responseState": "FAILURE",
-                    "responseBody": {"TEXT": {"body": json.dumps({"error": f"Unknown function: {function_name}"})}}
+                    "responseBody": {"TEXT": {"body": orjson.dumps({"error": f"Unknown function: {function_name}"}).decode()}}
                 },
             },
         }
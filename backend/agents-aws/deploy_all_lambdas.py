@@ -7,20 +7,34 @@ Deploys job, course, and project tools
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 
+# Sub-deployments in display order, with the .env variable each ARN maps to.
+# Validation reports several ARNs, which are printed separately below.
+DEPLOYMENTS = [
+    ("job", "LAMBDA_JOB_MARKET_TOOLS_ARN"),
+    ("nebula", "LAMBDA_NEBULA_API_TOOLS_ARN"),
+    ("projects", "LAMBDA_PROJECT_TOOLS_ARN"),
+    ("validation", None),
+    ("catalog-browser", "LAMBDA_CATALOG_BROWSER_ARN"),
+]
+
+
 def run_deployment_script(folder_name, script_name):
-    """Run a deployment script in a specific folder and capture Lambda ARN"""
-    print(f"\n{'='*60}")
-    print(f"Deploying {folder_name.title()} Lambda Function")
-    print(f"{'='*60}")
+    """Run a deployment script in a specific folder and capture Lambda ARN
+
+    Returns (success, arn, log). The log is collected rather than printed so
+    that deployments running in parallel do not interleave their output.
+    """
+    log = [f"\n{'='*60}", f"Deploying {folder_name.title()} Lambda Function", "=" * 60]
 
     script_path = Path(folder_name) / script_name
 
     if not script_path.exists():
-        print(f"❌ Deployment script not found: {script_path}")
-        return False, None
+        log.append(f"❌ Deployment script not found: {script_path}")
+        return False, None, "\n".join(log)
 
     try:
         # Change to the folder and run the deployment script
@@ -31,7 +45,8 @@ def run_deployment_script(folder_name, script_name):
             capture_output=True,
             text=True,
         )
-        print(f"✓ {folder_name.title()} deployment completed successfully")
+        log.append(result.stdout.rstrip())
+        log.append(f"✓ {folder_name.title()} deployment completed successfully")
 
         # Extract Lambda ARN from output
         lambda_arn = None
@@ -44,10 +59,56 @@ def run_deployment_script(folder_name, script_name):
                 lambda_arn = line.split("=")[1].strip()
                 break
 
-        return True, lambda_arn
+        return True, lambda_arn, "\n".join(log)
     except subprocess.CalledProcessError as e:
-        print(f"❌ {folder_name.title()} deployment failed: {e}")
-        return False, None
+        log.append((e.stdout or "").rstrip())
+        log.append((e.stderr or "").rstrip())
+        log.append(f"❌ {folder_name.title()} deployment failed: {e}")
+        return False, None, "\n".join(log)
+
+
+def get_account_id():
+    """Return the AWS account id, from AWS_ACCOUNT_ID or a single STS call"""
+    account_id = os.getenv("AWS_ACCOUNT_ID")
+    if account_id:
+        return account_id
+
+    try:
+        import boto3
+        from dotenv import load_dotenv
+
+        load_dotenv(Path(__file__).parent.parent.parent / ".env")
+        sts_client = boto3.client("sts", region_name=os.getenv("AWS_REGION", "us-east-1"))
+        return sts_client.get_caller_identity()["Account"]
+    except Exception as e:
+        print(f"⚠️  Could not look up AWS account id, each deployment will: {e}")
+        return None
+
+
+def deploy_shared_layer():
+    """Publish the shared dependency layer and return its ARN (None on failure)"""
+    print(f"\n{'='*60}")
+    print("Deploying Shared Dependency Layer")
+    print(f"{'='*60}")
+
+    try:
+        result = subprocess.run(
+            [sys.executable, "deploy_shared_layer.py"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except subprocess.CalledProcessError as e:
+        print((e.stdout or "").rstrip())
+        print((e.stderr or "").rstrip())
+        print(f"⚠️  Shared layer deployment failed, functions will bundle their dependencies: {e}")
+        return None
+
+    for line in result.stdout.split("\n"):
+        if line.startswith("LAMBDA_SHARED_LAYER_ARN="):
+            print(f"✓ Shared layer ready: {line.split('=', 1)[1].strip()}")
+            return line.split("=", 1)[1].strip()
+    return None
 
 
 def main():
@@ -84,41 +145,38 @@ def main():
         print("    └── catalog-browser/")
         sys.exit(1)
 
+    # Resolve the account once instead of one STS call per deployment
+    account_id = get_account_id()
+    if account_id:
+        os.environ["AWS_ACCOUNT_ID"] = account_id
+
+    # Publish the shared dependency layer first; the function deploys inherit
+    # its ARN and then upload just their handler modules
+    layer_arn = deploy_shared_layer()
+    if layer_arn:
+        os.environ["LAMBDA_SHARED_LAYER_ARN"] = layer_arn
+
+    # The deployments are independent (own folder, role and function), so run
+    # them side by side; wall time is then roughly that of the slowest one
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=len(DEPLOYMENTS)) as executor:
+        futures = {
+            executor.submit(run_deployment_script, folder, "deploy_lambda.py"): folder
+            for folder, _ in DEPLOYMENTS
+        }
+        for future in as_completed(futures):
+            success, arn, log = future.result()
+            print(log, flush=True)
+            outcomes[futures[future]] = (success, arn)
+
     # Track deployment results and ARNs
     results = {}
     lambda_arns = {}
-
-    # Deploy Job Market Tools
-    success, arn = run_deployment_script("job", "deploy_lambda.py")
-    results["job"] = success
-    if success and arn:
-        lambda_arns["LAMBDA_JOB_MARKET_TOOLS_ARN"] = arn
-
-    # Deploy Nebula API Tools (Course Catalog)
-    success, arn = run_deployment_script("nebula", "deploy_lambda.py")
-    results["nebula"] = success
-    if success and arn:
-        lambda_arns["LAMBDA_NEBULA_API_TOOLS_ARN"] = arn
-
-    # Deploy Project Tools
-    success, arn = run_deployment_script("projects", "deploy_lambda.py")
-    results["projects"] = success
-    if success and arn:
-        lambda_arns["LAMBDA_PROJECT_TOOLS_ARN"] = arn
-
-    # Deploy Validation Tools
-    success, arn = run_deployment_script("validation", "deploy_lambda.py")
-    results["validation"] = success
-    if success and arn:
-        # Validation returns multiple ARNs, handle them separately
-        # We'll need to parse the validation output differently
-        pass
-
-    # Deploy Catalog Browser Tools
-    success, arn = run_deployment_script("catalog-browser", "deploy_lambda.py")
-    results["catalog-browser"] = success
-    if success and arn:
-        lambda_arns["LAMBDA_CATALOG_BROWSER_ARN"] = arn
+    for folder, env_var in DEPLOYMENTS:
+        success, arn = outcomes[folder]
+        results[folder] = success
+        if success and arn and env_var:
+            lambda_arns[env_var] = arn
 
     # Summary
     print(f"\n{'='*80}")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Publish the shared dependency layer used by the Lambda functions
+Installs the union of their requirements once, so each function package
+only has to carry its own handler module
+"""
+
+import base64
+import boto3
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from botocore.config import Config
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load .env from project root (2 levels up from this file)
+env_path = Path(__file__).parent.parent.parent / '.env'
+load_dotenv(env_path)
+print(f"Loading .env from: {env_path}")
+
+# Explicitly set AWS credentials from .env for boto3
+os.environ["AWS_ACCESS_KEY_ID"] = os.getenv("AWS_ACCESS_KEY_ID", "")
+os.environ["AWS_SECRET_ACCESS_KEY"] = os.getenv("AWS_SECRET_ACCESS_KEY", "")
+os.environ["AWS_REGION"] = os.getenv("AWS_REGION", "us-east-1")
+
+# One session for every client: credentials are resolved once and the
+# clients share a keep-alive pool with adaptive retries
+session = boto3.Session(region_name=os.getenv("AWS_REGION", "us-east-1"))
+CLIENT_CONFIG = Config(max_pool_connections=50, retries={"max_attempts": 5, "mode": "adaptive"})
+
+lambda_client = session.client("lambda", config=CLIENT_CONFIG)
+
+LAYER_NAME = "UTD_SharedDeps"
+# Functions whose lambda_requirements.txt go into the layer
+SHARED_LAYER_FOLDERS = ["job", "nebula"]
+# Must match the functions' ARCHITECTURE / PIP_PLATFORM in their deploy scripts
+ARCHITECTURE = "arm64"
+RUNTIME_PYTHON_VERSION = "3.11"
+PIP_PLATFORM = "manylinux2014_aarch64"
+# Directories and files Lambda never reads at import time; leaving them out
+# shrinks the layer and the bytes fetched on a cold start
+PRUNE_DIR_NAMES = {"__pycache__", "tests", "test", "locale"}
+PRUNE_FILE_SUFFIXES = (".pyc", ".pyo")
+# Earliest timestamp a zip entry can carry
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+
+
+def collect_requirements():
+    """Union of the shared folders' requirements, in first-seen order"""
+    base = Path(__file__).parent
+    requirements = {}
+    for folder in SHARED_LAYER_FOLDERS:
+        for line in (base / folder / "lambda_requirements.txt").read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                requirements[line] = None
+    return list(requirements)
+
+
+def prune_package(package_dir):
+    """Delete bytecode, bundled test suites, locales and dist-info RECORDs"""
+    removed = 0
+    # Deepest paths first, so nested matches go before their parents
+    for path in sorted(Path(package_dir).rglob("*"), reverse=True):
+        if not path.exists():
+            continue
+        if path.is_dir() and path.name in PRUNE_DIR_NAMES:
+            shutil.rmtree(path)
+            removed += 1
+        elif path.is_file() and (
+            path.suffix in PRUNE_FILE_SUFFIXES
+            or (path.name == "RECORD" and path.parent.name.endswith(".dist-info"))
+        ):
+            path.unlink()
+            removed += 1
+    print(f"  Pruned {removed} unused paths")
+
+
+def create_layer_package(requirements):
+    """Install the requirements under python/ and zip them reproducibly"""
+    print("\nCreating layer package...")
+    build_dir = tempfile.mkdtemp()
+    try:
+        requirements_path = os.path.join(build_dir, "requirements.txt")
+        with open(requirements_path, "w") as f:
+            f.write("\n".join(requirements) + "\n")
+
+        # Lambda puts /opt/python on sys.path for Python layers
+        package_dir = os.path.join(build_dir, "python")
+        print(f"  Installing {len(requirements)} requirements...")
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pip",
+                "install",
+                "-r",
+                requirements_path,
+                "-t",
+                package_dir,
+                "--platform",
+                PIP_PLATFORM,
+                "--python-version",
+                RUNTIME_PYTHON_VERSION,
+                "--implementation",
+                "cp",
+                "--only-binary=:all:",
+                "--quiet",
+            ],
+            check=True,
+        )
+
+        prune_package(package_dir)
+
+        zip_path = "shared_deps_layer.zip"
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            base = Path(build_dir)
+            for path in sorted(Path(package_dir).rglob("*")):
+                if not path.is_file():
+                    continue
+                info = zipfile.ZipInfo(path.relative_to(base).as_posix(), date_time=ZIP_TIMESTAMP)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                zipf.writestr(info, path.read_bytes(), compresslevel=1)
+    finally:
+        shutil.rmtree(build_dir)
+
+    print(f"✓ Created {zip_path}")
+    return zip_path
+
+
+def publish_layer(zip_path):
+    """Publish a new layer version unless the latest one has the same content"""
+    print("\nPublishing layer...")
+
+    with open(zip_path, "rb") as f:
+        zip_content = f.read()
+    local_sha = base64.b64encode(hashlib.sha256(zip_content).digest()).decode()
+
+    versions = lambda_client.list_layer_versions(LayerName=LAYER_NAME, MaxItems=1)["LayerVersions"]
+    if versions:
+        latest = lambda_client.get_layer_version(
+            LayerName=LAYER_NAME, VersionNumber=versions[0]["Version"]
+        )
+        if latest["Content"]["CodeSha256"] == local_sha:
+            layer_arn = latest["LayerVersionArn"]
+            print(f"✓ Layer unchanged, reusing: {layer_arn}")
+            return layer_arn
+
+    response = lambda_client.publish_layer_version(
+        LayerName=LAYER_NAME,
+        Description="Shared dependencies for UTD Career Spark Lambda functions",
+        Content={"ZipFile": zip_content},
+        CompatibleRuntimes=[f"python{RUNTIME_PYTHON_VERSION}"],
+        CompatibleArchitectures=[ARCHITECTURE],
+    )
+    layer_arn = response["LayerVersionArn"]
+    print(f"✓ Published layer: {layer_arn}")
+    return layer_arn
+
+
+def main():
+    print("=" * 60)
+    print("Deploying Shared Dependency Layer")
+    print("=" * 60)
+
+    # Step 1: Build the layer package
+    zip_path = create_layer_package(collect_requirements())
+
+    # Step 2: Publish it (or reuse the identical latest version)
+    layer_arn = publish_layer(zip_path)
+
+    # Step 3: Cleanup
+    os.remove(zip_path)
+
+    print(f"\nLayer ARN: {layer_arn}")
+    print("\nFunction deploy scripts pick the layer up from:")
+    print(f"LAMBDA_SHARED_LAYER_ARN={layer_arn}")
+
+
+if __name__ == "__main__":
+    main()
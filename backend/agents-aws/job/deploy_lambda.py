@@ -3,12 +3,20 @@
 Automated Lambda deployment for Job Market tools
 """
 
+import base64
 import boto3
+import hashlib
 import os
 import zipfile
 import shutil
 import subprocess
 import sys
+import tempfile
+import json
+import time
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -22,13 +30,89 @@ os.environ["AWS_ACCESS_KEY_ID"] = os.getenv("AWS_ACCESS_KEY_ID", "")
 os.environ["AWS_SECRET_ACCESS_KEY"] = os.getenv("AWS_SECRET_ACCESS_KEY", "")
 os.environ["AWS_REGION"] = os.getenv("AWS_REGION", "us-east-1")
 
-lambda_client = boto3.client("lambda", region_name=os.getenv("AWS_REGION", "us-east-1"))
-iam_client = boto3.client("iam", region_name=os.getenv("AWS_REGION", "us-east-1"))
+# One session for every client: credentials are resolved once and the
+# clients share a keep-alive pool with adaptive retries
+session = boto3.Session(region_name=os.getenv("AWS_REGION", "us-east-1"))
+CLIENT_CONFIG = Config(max_pool_connections=50, retries={"max_attempts": 5, "mode": "adaptive"})
+
+lambda_client = session.client("lambda", config=CLIENT_CONFIG)
+# Created on first use; cached or configured roles never need IAM
+_iam_client = None
 
 FUNCTION_NAME = "UTD_JobMarketTools"
+# pip installs keyed by requirements + Python version, reused between deploys
+DEPS_CACHE_ROOT = Path.home() / ".lambda_deps_cache"
+# Layer from deploy_shared_layer.py; when set, the package is the handler only
+SHARED_LAYER_ARN = os.getenv("LAMBDA_SHARED_LAYER_ARN")
+# Optional bucket for code uploads; parallel multipart beats the inline ZipFile
+DEPLOY_BUCKET = os.getenv("LAMBDA_DEPLOY_BUCKET")
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, max_concurrency=10)
+# Graviton functions: about 20% cheaper than x86_64 at the same speed. pip
+# fetches Linux aarch64 wheels for the Lambda runtime, whatever the host is
+ARCHITECTURE = "arm64"
+RUNTIME_PYTHON_VERSION = "3.11"
+PIP_PLATFORM = "manylinux2014_aarch64"
+# CPU scales with memory, so the parsing finishes sooner for roughly the same
+# GB-seconds; the timeout covers two sequential 10 s fetches on the HN path
+MEMORY_SIZE = 1024
+TIMEOUT = 30
+# Earliest timestamp a zip entry can carry
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+# Role ARN and account id lookups shared by the deploy scripts, per profile and
+# access key. Without a key in the environment (profile, SSO or instance role
+# credentials) nothing identifies the account, so the cache is not used
+DEPLOY_CACHE_PATH = Path.home() / ".cache" / "utd-career-spark-deploy.json"
+DEPLOY_CACHE_TTL_SECONDS = 24 * 3600
+DEPLOY_CACHE_SCOPE = (
+    hashlib.sha256(
+        f"{os.getenv('AWS_PROFILE', '')}:{os.environ['AWS_ACCESS_KEY_ID']}".encode()
+    ).hexdigest()[:16]
+    if os.environ["AWS_ACCESS_KEY_ID"]
+    else None
+)
 ROLE_NAME = "UTD_JobMarketToolsLambdaRole"
 
 
+def get_iam_client():
+    """Return the IAM client, creating it on first use"""
+    global _iam_client
+    if _iam_client is None:
+        _iam_client = session.client("iam", config=CLIENT_CONFIG)
+    return _iam_client
+
+
+def read_deploy_cache(key):
+    """Return a value cached by a recent deploy, or None if missing or stale"""
+    if DEPLOY_CACHE_SCOPE is None:
+        return None
+    try:
+        entry = json.loads(DEPLOY_CACHE_PATH.read_text())[DEPLOY_CACHE_SCOPE][key]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if time.time() - entry["ts"] > DEPLOY_CACHE_TTL_SECONDS:
+        return None
+    return entry["value"]
+
+
+def write_deploy_cache(key, value):
+    """Remember a looked-up value for later deploys (best effort)"""
+    if DEPLOY_CACHE_SCOPE is None:
+        return
+    try:
+        cache = json.loads(DEPLOY_CACHE_PATH.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    cache.setdefault(DEPLOY_CACHE_SCOPE, {})[key] = {"value": value, "ts": time.time()}
+    try:
+        DEPLOY_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # Replace atomically; deploys running in parallel share this file
+        tmp_path = DEPLOY_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(cache))
+        os.replace(tmp_path, DEPLOY_CACHE_PATH)
+    except OSError as e:
+        print(f"  Could not write deploy cache: {e}")
+
+
 def get_lambda_role():
     """Get Lambda execution role ARN"""
     print("Getting Lambda execution role...")
@@ -47,11 +131,18 @@ def get_lambda_role():
         print(f"✓ Using AgentCore execution role: {role_arn}")
         return role_arn
 
+    role_arn = read_deploy_cache(f"role_arn:{ROLE_NAME}")
+
+    if role_arn:
+        print(f"✓ Using cached role: {role_arn}")
+        return role_arn
+
     # Try to check if default role exists
     try:
-        role_response = iam_client.get_role(RoleName=ROLE_NAME)
+        role_response = get_iam_client().get_role(RoleName=ROLE_NAME)
         role_arn = role_response["Role"]["Arn"]
         print(f"✓ Using existing role: {role_arn}")
+        write_deploy_cache(f"role_arn:{ROLE_NAME}", role_arn)
         return role_arn
     except:
         print("\n❌ No Lambda execution role found!")
@@ -62,6 +153,65 @@ def get_lambda_role():
         sys.exit(1)
 
 
+def get_cached_dependencies():
+    """Return a directory with lambda_requirements.txt installed into it
+
+    pip only runs when this exact requirements file has not been installed for
+    the target runtime and platform before.
+    """
+    with open("lambda_requirements.txt", "rb") as f:
+        key = f.read() + f"{RUNTIME_PYTHON_VERSION}-{PIP_PLATFORM}".encode()
+    cache_dir = DEPS_CACHE_ROOT / hashlib.sha256(key).hexdigest()
+    if cache_dir.is_dir():
+        print(f"  Using cached dependencies from {cache_dir}")
+        return cache_dir
+
+    print("  Installing dependencies...")
+    DEPS_CACHE_ROOT.mkdir(parents=True, exist_ok=True)
+    # Install next to the cache entry and rename it in, so an interrupted
+    # install never leaves a half-populated entry behind
+    tmp_dir = tempfile.mkdtemp(dir=DEPS_CACHE_ROOT)
+    try:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "pip",
+                "install",
+                "-r",
+                "lambda_requirements.txt",
+                "-t",
+                tmp_dir,
+                "--platform",
+                PIP_PLATFORM,
+                "--python-version",
+                RUNTIME_PYTHON_VERSION,
+                "--implementation",
+                "cp",
+                "--only-binary=:all:",
+                "--quiet",
+            ],
+            check=True,
+        )
+    except subprocess.CalledProcessError:
+        shutil.rmtree(tmp_dir)
+        raise
+    try:
+        os.rename(tmp_dir, cache_dir)
+    except OSError:
+        # Another deploy filled the same entry first
+        shutil.rmtree(tmp_dir)
+    return cache_dir
+
+
+def _link_or_copy(src, dst):
+    """Hardlink a cached file into the package, copying across filesystems"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
 def create_deployment_package():
     """Create Lambda deployment ZIP file"""
     print("\nCreating deployment package...")
@@ -72,22 +222,12 @@ def create_deployment_package():
         shutil.rmtree(package_dir)
     os.makedirs(package_dir)
 
-    # Install dependencies
-    print("  Installing dependencies...")
-    subprocess.run(
-        [
-            sys.executable,
-            "-m",
-            "pip",
-            "install",
-            "-r",
-            "lambda_requirements.txt",
-            "-t",
-            package_dir,
-            "--quiet",
-        ],
-        check=True,
-    )
+    # Install dependencies (or reuse a previous install of the same set)
+    if SHARED_LAYER_ARN:
+        print(f"  Dependencies come from shared layer: {SHARED_LAYER_ARN}")
+    else:
+        deps_dir = get_cached_dependencies()
+        shutil.copytree(deps_dir, package_dir, dirs_exist_ok=True, copy_function=_link_or_copy)
 
     # Copy Lambda function
     shutil.copy("lambda_job_market_tools.py", package_dir)
@@ -97,12 +237,17 @@ def create_deployment_package():
     if os.path.exists(zip_path):
         os.remove(zip_path)
 
+    # Sorted entries with fixed timestamps and modes make the zip reproducible,
+    # so an unchanged build hashes to the deployed CodeSha256 and is skipped
     with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(package_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, package_dir)
-                zipf.write(file_path, arcname)
+        base = Path(package_dir)
+        for path in sorted(base.rglob("*")):
+            if not path.is_file():
+                continue
+            info = zipfile.ZipInfo(path.relative_to(base).as_posix(), date_time=ZIP_TIMESTAMP)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            zipf.writestr(info, path.read_bytes(), compresslevel=1)
 
     # Cleanup
     shutil.rmtree(package_dir)
@@ -111,36 +256,88 @@ def create_deployment_package():
     return zip_path
 
 
+def upload_package_to_s3(zip_path, sha256_hex):
+    """Upload the package to DEPLOY_BUCKET under its content hash
+
+    Returns the Code/update_function_code arguments pointing at the object. An
+    object already stored under the same hash is not uploaded again.
+    """
+    s3_client = session.client("s3", config=CLIENT_CONFIG)
+    key = f"{FUNCTION_NAME}/{sha256_hex}.zip"
+    try:
+        s3_client.head_object(Bucket=DEPLOY_BUCKET, Key=key)
+        print(f"  Package already in s3://{DEPLOY_BUCKET}/{key}")
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+            raise
+        print(f"  Uploading package to s3://{DEPLOY_BUCKET}/{key}...")
+        s3_client.upload_file(
+            zip_path,
+            DEPLOY_BUCKET,
+            key,
+            ExtraArgs={"Metadata": {"sha256": sha256_hex}},
+            Config=TRANSFER_CONFIG,
+        )
+    return {"S3Bucket": DEPLOY_BUCKET, "S3Key": key}
+
+
 def deploy_lambda_function(role_arn, zip_path):
     """Deploy or update Lambda function"""
     print("\nDeploying Lambda function...")
 
     with open(zip_path, "rb") as f:
         zip_content = f.read()
+    # Lambda reports CodeSha256 as the base64 SHA-256 of the deployed zip
+    digest = hashlib.sha256(zip_content).digest()
+    local_sha = base64.b64encode(digest).decode()
+    if DEPLOY_BUCKET:
+        code = upload_package_to_s3(zip_path, digest.hex())
+    else:
+        code = {"ZipFile": zip_content}
 
     try:
         # Try to create new function
         response = lambda_client.create_function(
             FunctionName=FUNCTION_NAME,
-            Runtime="python3.11",
+            Runtime=f"python{RUNTIME_PYTHON_VERSION}",
+            Architectures=[ARCHITECTURE],
             Role=role_arn,
             Handler="lambda_job_market_tools.lambda_handler",
-            Code={"ZipFile": zip_content},
-            Timeout=60,  # 60 seconds for web scraping
-            MemorySize=512,
+            Code=code,
+            Layers=[SHARED_LAYER_ARN] if SHARED_LAYER_ARN else [],
+            Timeout=TIMEOUT,
+            MemorySize=MEMORY_SIZE,
             Description="Web scraping tools for UTD Career Spark job market data",
         )
         function_arn = response["FunctionArn"]
         print(f"✓ Created Lambda function: {function_arn}")
 
     except lambda_client.exceptions.ResourceConflictException:
-        # Function exists, update it
-        print("  Function exists, updating code...")
-        response = lambda_client.update_function_code(
-            FunctionName=FUNCTION_NAME, ZipFile=zip_content
-        )
-        function_arn = response["FunctionArn"]
-        print(f"✓ Updated Lambda function: {function_arn}")
+        # Function exists; skip the upload if the deployed code is identical
+        config = lambda_client.get_function_configuration(FunctionName=FUNCTION_NAME)
+        if config["CodeSha256"] == local_sha and config.get("Architectures") == [ARCHITECTURE]:
+            function_arn = config["FunctionArn"]
+            print(f"✓ Lambda function code unchanged, skipping upload: {function_arn}")
+        else:
+            print("  Function exists, updating code...")
+            # The architecture is switched together with the code, since the
+            # bundled wheels only load on the platform they were built for
+            response = lambda_client.update_function_code(
+                FunctionName=FUNCTION_NAME, Architectures=[ARCHITECTURE], **code
+            )
+            function_arn = response["FunctionArn"]
+            print(f"✓ Updated Lambda function: {function_arn}")
+
+        updates = {}
+        if config["MemorySize"] != MEMORY_SIZE or config["Timeout"] != TIMEOUT:
+            updates.update(MemorySize=MEMORY_SIZE, Timeout=TIMEOUT)
+        if SHARED_LAYER_ARN and [layer["Arn"] for layer in config.get("Layers", [])] != [SHARED_LAYER_ARN]:
+            updates["Layers"] = [SHARED_LAYER_ARN]
+        if updates:
+            # Configuration changes are rejected while a code update is in progress
+            lambda_client.get_waiter("function_updated").wait(FunctionName=FUNCTION_NAME)
+            lambda_client.update_function_configuration(FunctionName=FUNCTION_NAME, **updates)
+            print(f"✓ Updated function configuration: {', '.join(updates)}")
     
     except Exception as e:
         if "AccessDenied" in str(type(e)) or "not authorized" in str(e):
@@ -162,7 +359,11 @@ def add_bedrock_permission(function_arn):
     """Add permission for Bedrock to invoke Lambda"""
     print("\nAdding Bedrock invoke permission...")
 
-    account_id = boto3.client("sts").get_caller_identity()["Account"]
+    # deploy_all_lambdas.py looks the account up once and passes it down
+    account_id = os.getenv("AWS_ACCOUNT_ID") or read_deploy_cache("account_id")
+    if not account_id:
+        account_id = session.client("sts", config=CLIENT_CONFIG).get_caller_identity()["Account"]
+        write_deploy_cache("account_id", account_id)
 
     try:
         lambda_client.add_permission(
@@ -4,9 +4,75 @@ AWS Lambda function for Job Market tools
 Handles web scraping for Hacker News jobs and IT Jobs Watch skills
 """
 
-import json
+import html
+import orjson
 import re
-from typing import List, Tuple
+import requests
+import time
+from itertools import islice
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser
+from typing import List, Optional, Tuple
+
+# Shared keep-alive session, reused across warm invocations
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": "utd-career-spark/1.0"})
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Latest "Who is hiring?" thread, kept across warm invocations
+HN_THREAD_TTL_SECONDS = 6 * 3600
+_HN_THREAD_CACHE = {"thread_url": None, "expires": 0.0}
+
+# Each posting's markup runs from its comment div to the end of its table cell;
+# only the text before the first "|" of a posting is needed
+_COMMENT_RE = re.compile(rb'class="comment"[^>]*>(.*?)</td>', re.S)
+_TAG_RE = re.compile(r"<[^>]*>")
+_ROLE_RE = re.compile(r"([^|]*)\|")
+
+
+def extract_hackernews_roles(content: bytes, limit: int = 30) -> List[str]:
+    """Pull "Role | Company" prefixes out of a hiring thread's raw HTML.
+
+    Scans the page bytes directly instead of building a parse tree: one
+    compiled pattern walks the page and stops after `limit` comments, each of
+    which is stripped of tags and unescaped before the text ahead of its first
+    "|" is kept.
+    """
+    roles = []
+    for match in islice(_COMMENT_RE.finditer(content), limit):
+        text = html.unescape(_TAG_RE.sub("", match.group(1).decode("utf-8", "replace")))
+        role = _ROLE_RE.match(text)
+        if role:
+            roles.append(role.group(1).strip()[:100])  # Limit length
+    return roles
+
+
+def _find_hiring_thread_url() -> Optional[str]:
+    """Return the URL of the latest "Who is hiring?" thread.
+
+    The thread changes once a month, so a warm container reuses the last
+    lookup for HN_THREAD_TTL_SECONDS instead of fetching the submissions page
+    on every call.
+    """
+    now = time.monotonic()
+    if _HN_THREAD_CACHE["thread_url"] and now < _HN_THREAD_CACHE["expires"]:
+        return _HN_THREAD_CACHE["thread_url"]
+
+    # Find the latest "Who is Hiring?" thread
+    url = "https://news.ycombinator.com/submitted?id=whoishiring"
+    response = SESSION.get(url, timeout=10)
+    tree = LexborHTMLParser(response.content)
+
+    # Get the first "Who is Hiring?" post
+    for link in tree.css("a"):
+        if "Who is hiring?" in link.text():
+            thread_url = f"https://news.ycombinator.com/{link.attributes.get('href')}"
+            _HN_THREAD_CACHE["thread_url"] = thread_url
+            _HN_THREAD_CACHE["expires"] = now + HN_THREAD_TTL_SECONDS
+            return thread_url
+    return None
 
 
 def scrape_hackernews_jobs() -> Tuple[List[str], str]:
@@ -15,40 +81,15 @@ def scrape_hackernews_jobs() -> Tuple[List[str], str]:
     Returns: (list of job roles, summary)
     """
     try:
-        import requests
-        from bs4 import BeautifulSoup
-
-        # Find the latest "Who is Hiring?" thread
-        url = "https://news.ycombinator.com/submitted?id=whoishiring"
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Get the first "Who is Hiring?" post
-        hiring_link = None
-        for link in soup.find_all("a"):
-            if "Who is hiring?" in link.text:
-                hiring_link = link.get("href")
-                break
-
-        if not hiring_link:
+        thread_url = _find_hiring_thread_url()
+        if not thread_url:
             return ([], "Could not find current hiring thread")
 
         # Scrape the hiring thread
-        thread_url = f"https://news.ycombinator.com/{hiring_link}"
-        thread_response = requests.get(thread_url, timeout=10)
-        thread_soup = BeautifulSoup(thread_response.text, "html.parser")
-
-        roles = []
-        comments = thread_soup.find_all("div", class_="comment")
-
-        for comment in comments[:30]:  # Limit to first 30 postings
-            text = comment.get_text()
-            # Extract role/title (usually after company name, often in format "Role | Company")
-            if "|" in text:
-                parts = text.split("|")
-                if len(parts) >= 2:
-                    role = parts[0].strip()
-                    roles.append(role[:100])  # Limit length
+        thread_response = SESSION.get(thread_url, timeout=10)
+
+        # Limit to first 30 postings
+        roles = extract_hackernews_roles(thread_response.content, limit=30)
 
         return (roles[:30], f"Found {len(roles)} job postings")
 
@@ -62,23 +103,21 @@ def scrape_itjobswatch_skills() -> Tuple[List[str], str]:
     Returns: (list of skills with salary info, summary)
     """
     try:
-        import requests
-        from bs4 import BeautifulSoup
-
         url = "https://www.itjobswatch.co.uk/default.aspx?page=1&sortby=0&orderby=0&q=&id=0&lid=2618"
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = SESSION.get(url, timeout=10)
+        tree = LexborHTMLParser(response.content)
 
         skills = []
         # Find the skills table
-        table = soup.find("table", class_="results")
-        if table:
-            rows = table.find_all("tr")[1:]  # Skip header
+        table = tree.css_first("table.results")
+        if table is not None:
+            rows = table.css("tr")[1:]  # Skip header
             for row in rows[:20]:  # Limit to top 20
-                cols = row.find_all("td")
+                # Cells are the row's children; no selector to match per row
+                cols = [cell for cell in row.iter() if cell.tag == "td"]
                 if len(cols) >= 3:
-                    skill_name = cols[0].get_text(strip=True)
-                    median_salary = cols[2].get_text(strip=True)
+                    skill_name = cols[0].text(strip=True)
+                    median_salary = cols[2].text(strip=True)
                     skills.append(f"{skill_name}: {median_salary}")
 
         return (skills[:20], f"Found {len(skills)} trending skills")
@@ -98,7 +137,7 @@ def lambda_handler(event, context):
         "parameters": []
     }
     """
-    print(f"Received event: {json.dumps(event)}")
+    print(f"Received event: {orjson.dumps(event).decode()}")
 
     # Extract action group and function from event
     action_group = event.get("actionGroup", "")
@@ -121,7 +160,7 @@ def lambda_handler(event, context):
             "actionGroup": action_group,
             "function": function_name,
             "functionResponse": {
-                "responseBody": {"TEXT": {"body": json.dumps(result)}}
+                "responseBody": {"TEXT": {"body": orjson.dumps(result).decode()}}
             },
         },
     }
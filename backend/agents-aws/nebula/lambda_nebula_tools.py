@@ -4,10 +4,39 @@ AWS Lambda function for Nebula API tools
 Handles UTD course data retrieval from Nebula API
 """
 
-import json
+import orjson
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Tuple, Optional
+from urllib3.util.retry import Retry
+
+# Per-attempt (connect, read) timeouts. Only one retry is allowed and read
+# timeouts are never retried, so a call is done within about 16 s, well under
+# the 30 s function timeout
+REQUEST_TIMEOUT = (3.05, 8)
+# Upper bound on waiting for either half of a dashboard
+DASHBOARD_TIMEOUT_SECONDS = 20
+
+# Shared keep-alive session for api.utdnebula.com, reused across warm
+# invocations; transient throttling and gateway errors are retried briefly
+SESSION = requests.Session()
+SESSION.headers.update({"Accept": "application/json"})
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(
+            total=1, read=0, backoff_factor=0.1, status_forcelist=[429, 502, 503, 504]
+        ),
+    ),
+)
+
+# The dashboards fetch their info and trends side by side; the pool outlives
+# a single invocation like SESSION does
+EXECUTOR = ThreadPoolExecutor(max_workers=2)
 
 
 def calculate_grade_stats(grade_distribution: List[int]) -> Dict:
@@ -85,12 +114,12 @@ def get_course_sections_trends(
 
         url = "https://api.utdnebula.com/course/sections/trends"
         params = {"subject_prefix": subject_prefix, "course_number": course_number}
-        headers = {"x-api-key": api_key, "Accept": "application/json"}
+        headers = {"x-api-key": api_key}
 
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = SESSION.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
-        data = response.json()
+        data = orjson.loads(response.content)
         if data.get("message") == "error":
             return ([], f"API error: {data.get('data', 'Unknown error')}")
 
@@ -126,12 +155,12 @@ def get_professor_sections_trends(
 
         url = "https://api.utdnebula.com/professor/sections/trends"
         params = {"first_name": first_name, "last_name": last_name}
-        headers = {"x-api-key": api_key, "Accept": "application/json"}
+        headers = {"x-api-key": api_key}
 
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = SESSION.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
-        data = response.json()
+        data = orjson.loads(response.content)
         if data.get("message") == "error":
             return ([], f"API error: {data.get('data', 'Unknown error')}")
 
@@ -186,12 +215,12 @@ def get_grades_by_semester(
         if last_name:
             params["last_name"] = last_name
 
-        headers = {"x-api-key": api_key, "Accept": "application/json"}
+        headers = {"x-api-key": api_key}
 
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = SESSION.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
-        data = response.json()
+        data = orjson.loads(response.content)
         if data.get("message") == "error":
             return ([], f"API error: {data.get('data', 'Unknown error')}")
 
@@ -218,12 +247,12 @@ def get_course_information(subject_prefix: str, course_number: str) -> Tuple[Dic
 
         url = "https://api.utdnebula.com/course"
         params = {"subject_prefix": subject_prefix, "course_number": course_number}
-        headers = {"x-api-key": api_key, "Accept": "application/json"}
+        headers = {"x-api-key": api_key}
 
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = SESSION.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
-        data = response.json()
+        data = orjson.loads(response.content)
         if data.get("message") == "error":
             return ({}, f"API error: {data.get('data', 'Unknown error')}")
 
@@ -266,12 +295,12 @@ def get_professor_information(first_name: str, last_name: str) -> Tuple[Dict, st
 
         url = "https://api.utdnebula.com/professor"
         params = {"first_name": first_name, "last_name": last_name}
-        headers = {"x-api-key": api_key, "Accept": "application/json"}
+        headers = {"x-api-key": api_key}
 
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = SESSION.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
-        data = response.json()
+        data = orjson.loads(response.content)
         if data.get("message") == "error":
             return ({}, f"API error: {data.get('data', 'Unknown error')}")
 
@@ -310,15 +339,11 @@ def get_course_dashboard_data(
     Returns: (dashboard data dict, summary)
     """
     try:
-        # Get course information
-        course_info, course_summary = get_course_information(
-            subject_prefix, course_number
-        )
-
-        # Get course sections trends
-        sections_trends, trends_summary = get_course_sections_trends(
-            subject_prefix, course_number
-        )
+        # Get course information and sections trends concurrently
+        info_future = EXECUTOR.submit(get_course_information, subject_prefix, course_number)
+        trends_future = EXECUTOR.submit(get_course_sections_trends, subject_prefix, course_number)
+        course_info, course_summary = info_future.result(timeout=DASHBOARD_TIMEOUT_SECONDS)
+        sections_trends, trends_summary = trends_future.result(timeout=DASHBOARD_TIMEOUT_SECONDS)
 
         # Combine the data
         dashboard_data = {
@@ -335,6 +360,8 @@ def get_course_dashboard_data(
             f"Retrieved comprehensive dashboard data for {subject_prefix} {course_number}",
         )
 
+    except TimeoutError:
+        return ({}, f"Timed out retrieving dashboard data after {DASHBOARD_TIMEOUT_SECONDS} seconds")
     except Exception as e:
         return ({}, f"Error retrieving dashboard data: {str(e)}")
 
@@ -345,15 +372,11 @@ def get_professor_dashboard_data(first_name: str, last_name: str) -> Tuple[Dict,
     Returns: (dashboard data dict, summary)
     """
     try:
-        # Get professor information
-        professor_info, professor_summary = get_professor_information(
-            first_name, last_name
-        )
-
-        # Get professor sections trends
-        sections_trends, trends_summary = get_professor_sections_trends(
-            first_name, last_name
-        )
+        # Get professor information and sections trends concurrently
+        info_future = EXECUTOR.submit(get_professor_information, first_name, last_name)
+        trends_future = EXECUTOR.submit(get_professor_sections_trends, first_name, last_name)
+        professor_info, professor_summary = info_future.result(timeout=DASHBOARD_TIMEOUT_SECONDS)
+        sections_trends, trends_summary = trends_future.result(timeout=DASHBOARD_TIMEOUT_SECONDS)
 
         # Combine the data
         dashboard_data = {
@@ -370,6 +393,8 @@ def get_professor_dashboard_data(first_name: str, last_name: str) -> Tuple[Dict,
             f"Retrieved comprehensive dashboard data for Professor {first_name} {last_name}",
         )
 
+    except TimeoutError:
+        return ({}, f"Timed out retrieving professor dashboard data after {DASHBOARD_TIMEOUT_SECONDS} seconds")
     except Exception as e:
         return ({}, f"Error retrieving professor dashboard data: {str(e)}")
 
@@ -385,7 +410,7 @@ def lambda_handler(event, context):
         "parameters": [{"name": "subject_prefix", "type": "string", "value": "..."}, ...]
     }
     """
-    print(f"Received event: {json.dumps(event)}")
+    print(f"Received event: {orjson.dumps(event).decode()}")
 
     # Extract action group and function from event
     action_group = event.get("actionGroup", "")
@@ -459,7 +484,7 @@ def lambda_handler(event, context):
             "actionGroup": action_group,
             "function": function_name,
             "functionResponse": {
-                "responseBody": {"TEXT": {"body": json.dumps(result)}}
+                "responseBody": {"TEXT": {"body": orjson.dumps(result).decode()}}
             },
         },
     }
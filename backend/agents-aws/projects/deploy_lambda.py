@@ -192,7 +192,8 @@ def add_bedrock_permission(function_arn):
     """Add permission for Bedrock to invoke Lambda"""
     print("\nAdding Bedrock invoke permission...")
 
-    account_id = boto3.client("sts").get_caller_identity()["Account"]
+    # deploy_all_lambdas.py looks the account up once and passes it down
+    account_id = os.getenv("AWS_ACCOUNT_ID") or boto3.client("sts").get_caller_identity()["Account"]
 
     try:
         lambda_client.add_permission(
@@ -9,6 +9,7 @@ import zipfile
 import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -174,7 +175,8 @@ def add_bedrock_permission(function_name, function_arn):
     """Add permission for Bedrock to invoke Lambda"""
     print(f"\nAdding Bedrock invoke permission for {function_name}...")
 
-    account_id = boto3.client("sts").get_caller_identity()["Account"]
+    # deploy_all_lambdas.py looks the account up once and passes it down
+    account_id = os.getenv("AWS_ACCOUNT_ID") or boto3.client("sts").get_caller_identity()["Account"]
 
     try:
         lambda_client.add_permission(
@@ -189,6 +191,27 @@ def add_bedrock_permission(function_name, function_arn):
         print(f"✓ Permission already exists for {function_name}")
 
 
+def deploy_function(function_config, role_arn):
+    """Package, deploy and authorize one validation function"""
+    print(f"\n{'='*60}")
+    print(f"Deploying {function_config['name']}")
+    print("=" * 60)
+
+    # Create deployment package
+    zip_path = create_deployment_package(function_config["file"])
+
+    # Deploy Lambda
+    function_arn = deploy_lambda_function(function_config, role_arn, zip_path)
+
+    # Add Bedrock permission
+    add_bedrock_permission(function_config["name"], function_arn)
+
+    # Cleanup zip file
+    os.remove(zip_path)
+
+    return {"name": function_config["name"], "arn": function_arn}
+
+
 def main():
     print("=" * 60)
     print("Deploying Validation Lambda Functions")
@@ -197,30 +220,17 @@ def main():
     # Step 1: Get Lambda execution role
     role_arn = get_lambda_role()
 
-    deployed_functions = []
-
-    # Step 2: Deploy each function
-    for function_config in FUNCTIONS:
-        print(f"\n{'='*60}")
-        print(f"Deploying {function_config['name']}")
-        print("=" * 60)
-
-        # Create deployment package
-        zip_path = create_deployment_package(function_config["file"])
-
-        # Deploy Lambda
-        function_arn = deploy_lambda_function(function_config, role_arn, zip_path)
+    # Resolve the account once up front rather than from three threads
+    if not os.getenv("AWS_ACCOUNT_ID"):
+        os.environ["AWS_ACCOUNT_ID"] = boto3.client("sts").get_caller_identity()["Account"]
 
-        # Add Bedrock permission
-        add_bedrock_permission(function_config["name"], function_arn)
-
-        deployed_functions.append(
-            {"name": function_config["name"], "arn": function_arn}
+    # Step 2: Deploy the functions side by side; each has its own package
+    # directory, ZIP and function, so their pip installs and AWS calls overlap
+    with ThreadPoolExecutor(max_workers=len(FUNCTIONS)) as executor:
+        deployed_functions = list(
+            executor.map(lambda config: deploy_function(config, role_arn), FUNCTIONS)
         )
 
-        # Cleanup zip file
-        os.remove(zip_path)
-
     print("\n" + "=" * 60)
     print("SUCCESS! All validation functions deployed")
     print("=" * 60)
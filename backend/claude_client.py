@@ -6,12 +6,10 @@ Minimal Claude client for AWS Bedrock
 """
 
 import os
-import json
 from typing import Optional
-from dotenv import load_dotenv
 import boto3
+import orjson
 
-load_dotenv()
 REGION = os.getenv("AWS_REGION") or "us-east-1"
 # Try inference profile first, fallback to model ID if not available
 MODEL_ID = os.getenv("CLAUDE_MODEL_ID", "anthropic.claude-3-5-sonnet-20241022-v2:0")
@@ -46,10 +44,10 @@ def claude_chat(
 
     response = bedrock.invoke_model(
         modelId=MODEL_ID,
-        body=json.dumps(body),
+        body=orjson.dumps(body),
     )
 
-    payload = json.loads(response["body"].read().decode("utf-8"))
+    payload = orjson.loads(response["body"].read())
     return payload["content"][0]["text"]
 
 
@@ -12,8 +12,11 @@ import logging
 import re
 from dotenv import load_dotenv
 
+# Load .env once, before modules that read configuration at import time
+load_dotenv()
+
 from claude_client import claude_chat
-from agentcore_orchestrator import AgentCoreOrchestrator
+from agentcore_orchestrator import orchestrator
 
 # Configure logging
 logging.basicConfig(
@@ -21,8 +24,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 # Create FastAPI app
 app = FastAPI(
     title="UTD Career Spark API",
@@ -58,19 +59,23 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Initialize AgentCore orchestrator
-orchestrator = AgentCoreOrchestrator()
-
 
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup."""
     logger.info("UTD Career Spark API starting up...")
+    await orchestrator.start()
     logger.info(f"AgentCore orchestrator initialized: {bool(orchestrator.planner_id)}")
     logger.info("Application startup complete")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the shared AgentCore client on shutdown."""
+    await orchestrator.aclose()
+
+
 # Pydantic Models
 class IntroRequest(BaseModel):
     goal: str
@@ -454,7 +459,7 @@ async def api_plan_stream(request: PlanRequest):
         try:
             # Send session ID first
             session_event = {"type": "session", "session_id": session_id}
-            session_data = f"data: {json.dumps(session_event)}\n\n"
+            session_data = orchestrator.sse_frame(session_event)
             logger.info(f"SSE Event [SESSION]: {session_event}")
             yield session_data
 
@@ -464,19 +469,26 @@ async def api_plan_stream(request: PlanRequest):
                 goal=request.goal, session_id=session_id, user_context=user_context
             ):
                 event_count += 1
-                event_data = f"data: {json.dumps(event)}\n\n"
+                event_data = orchestrator.sse_frame(event)
 
                 # Log only trace events with full data and agent/subagent responses
                 if event.get("type") == "trace":
                     trace_data = event.get("data", {})
-                    logger.info(
-                        f"SSE Event [TRACE #{event_count}]: Full trace data: {trace_data}"
-                    )
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "SSE Event [TRACE #%d]: Full trace data: %s",
+                            event_count,
+                            orchestrator.log_dump(trace_data),
+                        )
 
                     # Log agent/subagent responses separately
                     if "collaborator_response" in trace_data:
                         collab_resp = trace_data["collaborator_response"]
-                        logger.info(f"Agent/Subagent Response: {collab_resp}")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(
+                                "Agent/Subagent Response: %s",
+                                orchestrator.log_dump(collab_resp),
+                            )
                 elif event.get("type") == "chunk":
                     # Only log chunk events if they contain agent responses
                     pass
@@ -490,7 +502,7 @@ async def api_plan_stream(request: PlanRequest):
 
             # Send completion event
             done_event = {"type": "done"}
-            done_data = f"data: {json.dumps(done_event)}\n\n"
+            done_data = orchestrator.sse_frame(done_event)
             logger.info(
                 f"SSE Event [DONE]: Stream completed after {event_count} events"
             )
@@ -499,7 +511,7 @@ async def api_plan_stream(request: PlanRequest):
         except Exception as exc:
             # Stream error event
             error_event = {"type": "error", "message": str(exc)}
-            error_data = f"data: {json.dumps(error_event)}\n\n"
+            error_data = orchestrator.sse_frame(error_event)
             logger.error(f"SSE Event [ERROR]: {exc}")
             yield error_data
 
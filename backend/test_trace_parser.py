@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test trace_parser helpers that need no AWS access.
+Run directly or with pytest.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from trace_parser import _infer_action_group_name
+
+
+def test_infer_action_group_priority():
+    """Job keywords beat course keywords, which beat project and Nebula ones"""
+    assert _infer_action_group_name("Professor list for course CS 1200") == "Course Catalog Tools"
+    assert _infer_action_group_name("GitHub project and hiring trends") == "Job Market Tools"
+    assert _infer_action_group_name("Nebula professor data") == "Nebula API Tools"
+    assert _infer_action_group_name("no keywords here") == "Lambda Tool"
+
+
+def test_infer_action_group_case_folded_text():
+    """Non-ASCII case-fold matches (long s) are classified instead of raising"""
+    assert _infer_action_group_name("Courſe list") == "Course Catalog Tools"
+    assert _infer_action_group_name("PROFEſſOR x") == "Nebula API Tools"
+    assert _infer_action_group_name("cſ 1200") == "Course Catalog Tools"
+
+
+def main():
+    test_infer_action_group_priority()
+    test_infer_action_group_case_folded_text()
+    print("✓ trace_parser tests passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""Parsing of InvokeAgent trace events into the trace payloads sent to the client.
+
+Everything here is a plain function over dicts and strings with no AWS or
+asyncio dependencies; per-stream state is passed in explicitly.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, MutableMapping, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on a single JSON trace dump in debug logs
+_LOG_DUMP_LIMIT = 4096
+
+# Agent label for traces emitted by the supervisor itself
+_SUPERVISOR_LABEL = "Supervisor"
+
+# Keywords used to guess the tool behind an untracked ACTION_GROUP
+# observation, one named group per priority class (earlier wins). Matches are
+# ranked by group name, so case-folded hits such as "courſe" need no lookup
+_TOOL_KIND_RE = re.compile(
+    r"(?P<job>job|hiring)|(?P<course>course|cs )|(?P<project>project|github)"
+    r"|(?P<nebula>nebula|professor)",
+    re.IGNORECASE,
+)
+_TOOL_KIND_MAP = {
+    "job": (0, "Job Market Tools"),
+    "course": (1, "Course Catalog Tools"),
+    "project": (2, "Project Tools"),
+    "nebula": (3, "Nebula API Tools"),
+}
+
+# Map knowledge base names to more user-friendly display names
+_KB_DISPLAY_NAMES = {
+    "knowledge_base": "Knowledge Base",
+    "course_catalog": "Course Catalog",
+    "academic_database": "Academic Database",
+}
+
+
+@dataclass(slots=True)
+class TraceResult:
+    """Parsed trace sent to the client; unset optional fields are omitted."""
+
+    agent: str
+    status: str
+    supervisor_id: str  # Groups traces under one supervisor run
+    agent_call_id: Optional[str] = None
+    reasoning: Optional[str] = None
+    calling_collaborator: Optional[str] = None
+    input_text: Optional[str] = None
+    collaborator_response: Optional[Dict[str, Any]] = None
+    failure_reason: Optional[str] = None
+    tool_calls: Optional[List[Dict[str, Any]]] = None
+    # Set by handlers that add reasoning, collaborator activity or tool calls;
+    # not part of the client payload
+    has_content: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {}
+        for name in _TRACE_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+
+_TRACE_FIELDS = tuple(f.name for f in fields(TraceResult) if f.name != "has_content")
+
+
+def log_dump(payload: Any, limit: int = _LOG_DUMP_LIMIT) -> str:
+    """Render a trace payload as compact JSON for debug logs, truncated to ``limit`` bytes."""
+    raw = orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+    if len(raw) > limit:
+        raw = raw[:limit] + b"...(truncated)"
+    return raw.decode("utf-8", "replace")
+
+
+def _infer_action_group_name(output_text: str) -> str:
+    """Guess the action group display name from its output in a single regex pass."""
+    best = (len(_TOOL_KIND_MAP), "Lambda Tool")
+    for match in _TOOL_KIND_RE.finditer(output_text):
+        kind = _TOOL_KIND_MAP[match.lastgroup]
+        if kind < best:
+            best = kind
+            if kind[0] == 0:
+                break
+    return best[1]
+
+
+def _handle_collab_input(
+    inv: Dict[str, Any],
+    result: TraceResult,
+    session_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> None:
+    collab_input = inv.get("agentCollaboratorInvocationInput", {})
+    collab_name = collab_input.get("agentCollaboratorName")
+
+    # Generate unique call ID for this collaborator invocation
+    count = counts.get(collab_name, 0) + 1
+    counts[collab_name] = count
+    result.agent_call_id = f"{session_id}_{collab_name}_{count}"
+
+    result.calling_collaborator = collab_name
+    result.input_text = collab_input.get("input", {}).get("text")
+    result.status = "started"  # Collaborator invocation started
+    result.has_content = True
+
+
+def _handle_action_input(
+    inv: Dict[str, Any],
+    result: TraceResult,
+    session_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> None:
+    action_input = inv.get("actionGroupInvocationInput", {})
+    trace_id = inv.get("traceId")
+    if not (trace_id and action_input):
+        return
+
+    # Extract action group details
+    action_group_name = action_input.get("actionGroupName", "Unknown Action Group")
+    function_name = action_input.get("function", "Unknown Function")
+    api_path = action_input.get("apiPath", "")
+    verb = action_input.get("verb", "")
+    execution_type = action_input.get("executionType", "LAMBDA")
+
+    # Convert parameters array to dict for easier frontend display
+    parameters = {
+        p["name"]: p["value"]
+        for p in action_input.get("parameters", [])
+        if "name" in p and "value" in p
+    }
+
+    # Store invocation details for later matching with observation
+    invocations[trace_id] = {
+        "actionGroupName": action_group_name,
+        "function": function_name,
+        "apiPath": api_path,
+        "verb": verb,
+        "executionType": execution_type,
+        "parameters": parameters,
+        "sessionId": session_id
+    }
+
+    # Create tool call entry with "calling" status
+    tool_calls = result.tool_calls
+    if tool_calls is None:
+        tool_calls = result.tool_calls = []
+        result.has_content = True
+    tool_calls.append({
+        "type": "action_group",
+        "name": action_group_name,
+        "function": function_name,
+        "status": "calling",
+        "parameters": parameters,
+        "api_path": api_path,
+        "verb": verb,
+        "trace_id": trace_id
+    })
+
+    logger.info(
+        "Action group invocation started: %s.%s (traceId: %s)",
+        action_group_name,
+        function_name,
+        trace_id,
+    )
+
+
+def _handle_kb_input(
+    inv: Dict[str, Any],
+    result: TraceResult,
+    session_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> None:
+    kb_input = inv.get("knowledgeBaseLookupInput", {})
+    trace_id = inv.get("traceId")
+    if not (trace_id and kb_input):
+        return
+
+    kb_id = kb_input.get("knowledgeBaseId", "unknown")
+    query_text = kb_input.get("text", "")
+
+    # Store KB invocation details
+    invocations[trace_id] = {
+        "knowledgeBaseId": kb_id,
+        "query": query_text,
+        "sessionId": session_id
+    }
+
+    # Create tool call entry
+    tool_calls = result.tool_calls
+    if tool_calls is None:
+        tool_calls = result.tool_calls = []
+        result.has_content = True
+    tool_calls.append({
+        "type": "knowledge_base",
+        "name": kb_id.replace("_", " ").title(),
+        "status": "calling",
+        "query": query_text,
+        "trace_id": trace_id
+    })
+
+    logger.info(
+        "Knowledge base lookup started: %s (traceId: %s)",
+        kb_id,
+        trace_id,
+    )
+
+
+def _handle_collab_obs(
+    obs: Dict[str, Any],
+    result: TraceResult,
+    session_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> None:
+    collab_output = obs.get("agentCollaboratorInvocationOutput", {})
+    collab_name = collab_output.get("agentCollaboratorName")
+
+    result.collaborator_response = {
+        "agent": collab_name,
+        "output": collab_output.get("output", {}).get("text"),
+    }
+    result.status = "completed"  # Collaborator response received
+    result.has_content = True
+
+    # Add agent_call_id for the completed collaborator
+    count = counts.get(collab_name) if collab_name else None
+    if count:
+        result.agent_call_id = f"{session_id}_{collab_name}_{count}"
+
+
+def _handle_action_obs(
+    obs: Dict[str, Any],
+    result: TraceResult,
+    session_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> None:
+    # Debug: log the full observation structure
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("ACTION_GROUP observation: %s", log_dump(obs))
+
+    # AWS Bedrock uses actionGroupInvocationOutput (not actionGroupInvocation)
+    action_inv = obs.get("actionGroupInvocationOutput", {})
+    trace_id = obs.get("traceId")
+    output_text = action_inv.get("text", "")
+
+    tool_calls = result.tool_calls
+    if tool_calls is None:
+        tool_calls = result.tool_calls = []
+        result.has_content = True
+
+    # Look up stored invocation details by traceId
+    stored_invocation = invocations.pop(trace_id, None) if trace_id else None
+    if stored_invocation is None:
+        # Fallback to old inference method if traceId not found
+        display_name = _infer_action_group_name(output_text)
+        tool_calls.append(
+            {
+                "type": "action_group",
+                "name": display_name,
+                "status": "completed",
+                "result": f"Completed {display_name}",
+            }
+        )
+        return
+
+    # Extract output details
+    metadata = action_inv.get("metadata", {})
+    execution_time_ms = metadata.get("totalTimeMs")
+    client_request_id = metadata.get("clientRequestId")
+
+    # Create completed tool call entry with all details
+    tool_call = {
+        "type": "action_group",
+        "name": stored_invocation["actionGroupName"],
+        "function": stored_invocation["function"],
+        "status": "completed",
+        "parameters": stored_invocation["parameters"],
+        "api_path": stored_invocation["apiPath"],
+        "verb": stored_invocation["verb"],
+        "trace_id": trace_id,
+        "result": f"Completed {stored_invocation['actionGroupName']}.{stored_invocation['function']}"
+    }
+
+    # Add optional fields if available
+    if execution_time_ms is not None:
+        tool_call["execution_time_ms"] = execution_time_ms
+    if client_request_id:
+        tool_call["client_request_id"] = client_request_id
+    if output_text:
+        tool_call["response"] = output_text
+
+    tool_calls.append(tool_call)
+
+    logger.info(
+        "Action group completed: %s.%s (traceId: %s, time: %sms)",
+        stored_invocation["actionGroupName"],
+        stored_invocation["function"],
+        trace_id,
+        execution_time_ms,
+    )
+
+
+def _handle_kb_obs(
+    obs: Dict[str, Any],
+    result: TraceResult,
+    session_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> None:
+    # Debug: log the full observation structure
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("KNOWLEDGE_BASE observation: %s", log_dump(obs))
+
+    kb_output = obs.get("knowledgeBaseLookupOutput", {})
+    trace_id = obs.get("traceId")
+
+    tool_calls = result.tool_calls
+    if tool_calls is None:
+        tool_calls = result.tool_calls = []
+        result.has_content = True
+
+    # Look up stored KB invocation details by traceId
+    stored_invocation = invocations.pop(trace_id, None) if trace_id else None
+    if stored_invocation is None:
+        # Fallback to old method if traceId not found
+        raw_kb_name = (
+            kb_output.get("knowledgeBaseName")
+            or kb_output.get("knowledgeBaseId")
+            or "knowledge_base"
+        )
+
+        display_name = _KB_DISPLAY_NAMES.get(
+            raw_kb_name
+        ) or raw_kb_name.replace("_", " ").title()
+
+        tool_calls.append(
+            {
+                "type": "knowledge_base",
+                "name": display_name,
+                "status": "completed",
+                "result": f"Completed {display_name}",
+            }
+        )
+        return
+
+    # Extract output details
+    metadata = kb_output.get("metadata", {})
+    execution_time_ms = metadata.get("totalTimeMs")
+    client_request_id = metadata.get("clientRequestId")
+    retrieved_references = kb_output.get("retrievedReferences", [])
+
+    # Create completed KB tool call entry
+    tool_call = {
+        "type": "knowledge_base",
+        "name": stored_invocation["knowledgeBaseId"].replace("_", " ").title(),
+        "status": "completed",
+        "query": stored_invocation["query"],
+        "trace_id": trace_id,
+        "result": f"Retrieved {len(retrieved_references)} references from {stored_invocation['knowledgeBaseId']}"
+    }
+
+    # Add optional fields if available
+    if execution_time_ms is not None:
+        tool_call["execution_time_ms"] = execution_time_ms
+    if client_request_id:
+        tool_call["client_request_id"] = client_request_id
+    if retrieved_references:
+        tool_call["references_count"] = len(retrieved_references)
+
+    tool_calls.append(tool_call)
+
+    logger.info(
+        "Knowledge base lookup completed: %s (traceId: %s, time: %sms, refs: %d)",
+        stored_invocation["knowledgeBaseId"],
+        trace_id,
+        execution_time_ms,
+        len(retrieved_references),
+    )
+
+
+# invocationType / observation type -> handler
+_INV_HANDLERS = {
+    "AGENT_COLLABORATOR": _handle_collab_input,
+    "ACTION_GROUP": _handle_action_input,
+    "KNOWLEDGE_BASE": _handle_kb_input,
+}
+_OBS_HANDLERS = {
+    "AGENT_COLLABORATOR": _handle_collab_obs,
+    "ACTION_GROUP": _handle_action_obs,
+    "KNOWLEDGE_BASE": _handle_kb_obs,
+}
+
+
+def _handle_failure(
+    failure: Dict[str, Any],
+    result: TraceResult,
+    session_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> None:
+    result.status = "failed"
+    result.failure_reason = failure.get("failureReason", "Unknown error")
+    logger.error("Agent failed: %s", result.failure_reason)
+
+
+def _handle_orchestration(
+    orch: Dict[str, Any],
+    result: TraceResult,
+    session_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> None:
+    # Log all available fields in orchestrationTrace
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("OrchestrationTrace keys: %s", list(orch.keys()))
+
+    # Reasoning
+    rationale = orch.get("rationale")
+    if rationale and rationale.get("text"):
+        result.reasoning = rationale["text"]
+        result.status = "progress"  # Reasoning indicates work in progress
+        result.has_content = True
+
+    inv = orch.get("invocationInput")
+    if inv is not None:
+        handler = _INV_HANDLERS.get(inv.get("invocationType"))
+        if handler is not None:
+            handler(inv, result, session_id, counts, invocations)
+
+    obs = orch.get("observation")
+    if obs is not None:
+        handler = _OBS_HANDLERS.get(obs.get("type"))
+        if handler is not None:
+            handler(obs, result, session_id, counts, invocations)
+
+
+# Checked in order: a failure wins over any orchestration step in the same trace
+_TRACE_HANDLERS = (
+    ("failureTrace", _handle_failure),
+    ("orchestrationTrace", _handle_orchestration),
+)
+
+
+def parse_trace_event(
+    event: Dict[str, Any],
+    session_id: str,
+    supervisor_id: str,
+    counts: Dict[str, int],
+    invocations: MutableMapping[str, Dict[str, Any]],
+) -> Optional[TraceResult]:
+    """Extract useful info from trace event.
+
+    ``counts`` (collaborator invocations) and ``invocations`` (pending action
+    group / knowledge base calls by traceId) carry state across one stream.
+    Returns None for traces that carry neither a failure nor an
+    orchestration step, since those never reach the client.
+    """
+    trace_part = event.get("trace", {})
+    trace_data = trace_part.get("trace", {})
+
+    # Log raw trace_part keys to see what's available
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Trace part keys: %s", list(trace_part.keys()))
+        logger.debug("Trace data keys: %s", list(trace_data.keys()))
+
+    # Skip pre/post-processing and routing traces before building a result
+    for key, handler in _TRACE_HANDLERS:
+        payload = trace_data.get(key)
+        if payload is not None:
+            break
+    else:
+        return None
+
+    # Extract agent/collaborator info
+    collaborator_name = trace_part.get("collaboratorName")
+    agent_label = (
+        f"Collaborator: {collaborator_name}"
+        if collaborator_name
+        else _SUPERVISOR_LABEL
+    )
+
+    result = TraceResult(agent_label, "progress", supervisor_id)
+
+    handler(payload, result, session_id, counts, invocations)
+
+    # Collaborator invocation/response handlers set their own agent_call_id;
+    # any other trace from a collaborator joins its latest invocation
+    if collaborator_name and result.agent_call_id is None:
+        count = counts.get(collaborator_name)
+        if count:
+            result.agent_call_id = f"{session_id}_{collaborator_name}_{count}"
+
+    return result
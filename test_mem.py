@@ -437,6 +437,7 @@ def persist_conversation_to_memory(
         actor_name = collaborator_map.get(collab_name, {}).get("agent_name") or collab_name
         runtime.record_agent_output(session_id, actor_name, text)
 
+    runtime.flush()
     return True
 
 